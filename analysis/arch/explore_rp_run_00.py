@@ -6,11 +6,18 @@ __copyright__ = 'Copyright 2022, The RADICAL-Cybertools Team'
 __license__   = 'MIT'
 
 import glob
-import json
 import os
+import sys
 
 import statistics as st
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..'))
+from prof_parser import get_agent_profs, get_event_times, \
+    merge_profs  # noqa: E402
+from slot_parser import read_slots  # noqa: E402
+from utilization import get_dvm_slots  # noqa: E402
+
 GPUS_PER_NODE = 6
 
 SID_PATH = '../data/rp.session.login5.matitov.018968.0000'
@@ -24,29 +31,25 @@ SID_PILOT_PATH = '../data/rp.session.login5.matitov.018968.0000.pilot'
 
 
 def get_scheduling_rate():
-    prof_file = '%s/pilot.0000/agent_scheduling.0000.prof' % SID_PATH
+    prof_files = get_agent_profs('%s/pilot.0000' % SID_PATH,
+                                 'agent_scheduling')
     check_time_window = 120.  # no new scheduled tasks -> break
     exec_pending_count = 0
     starttime = endtime = 0.
-    with open(prof_file, encoding='utf8') as fd:
-        while True:
-            line = fd.readline()
-            if not line:
-                break
+    for _, e in merge_profs(prof_files, use_mmap=True):
 
-            if not starttime:
-                if 'AGENT_SCHEDULING_PENDING,' in line:
-                    starttime = float(line.split(',')[0].strip())
-                continue
+        if not starttime:
+            if e.state == 'AGENT_SCHEDULING_PENDING':
+                starttime = e.time
+            continue
 
-            if 'put' in line and 'AGENT_EXECUTING_PENDING,' in line:
-                endtime = float(line.split(',')[0].strip())
-                exec_pending_count += 1
+        if e.event == 'put' and e.state == 'AGENT_EXECUTING_PENDING':
+            endtime = e.time
+            exec_pending_count += 1
 
-            elif 'unschedule_stop' in line:
-                check_time = float(line.split(',')[0].strip())
-                if (check_time - endtime) > check_time_window:
-                    break
+        elif e.event == 'unschedule_stop':
+            if (e.time - endtime) > check_time_window:
+                break
 
     sched_time = endtime - starttime
     sched_rate = round(exec_pending_count / sched_time, 2)
@@ -55,29 +58,25 @@ def get_scheduling_rate():
 
 
 def get_launching_rate():
-    prof_file = '%s/pilot.0000/agent_executing.0000.prof' % SID_PATH
+    prof_files = get_agent_profs('%s/pilot.0000' % SID_PATH,
+                                 'agent_executing')
     check_time_window = 120
     exec_launching_count = 0
     starttime = endtime = 0.
-    with open(prof_file, encoding='utf8') as fd:
-        while True:
-            line = fd.readline()
-            if not line:
-                break
+    for _, e in merge_profs(prof_files, use_mmap=True):
 
-            if not starttime:
-                if 'AGENT_EXECUTING_PENDING' in line:
-                    starttime = float(line.split(',')[0].strip())
-                continue
+        if not starttime:
+            if e.state == 'AGENT_EXECUTING_PENDING':
+                starttime = e.time
+            continue
 
-            if 'exec_ok' in line:
-                endtime = float(line.split(',')[0].strip())
-                exec_launching_count += 1
+        if e.event == 'exec_ok':
+            endtime = e.time
+            exec_launching_count += 1
 
-            elif 'AGENT_EXECUTING_PENDING' in line:
-                check_time = float(line.split(',')[0].strip())
-                if (check_time - endtime) > check_time_window:
-                    break
+        elif e.state == 'AGENT_EXECUTING_PENDING':
+            if (e.time - endtime) > check_time_window:
+                break
 
     launch_time = endtime - starttime
     launch_rate = round(exec_launching_count / launch_time, 2)
@@ -112,13 +111,10 @@ def get_utilization_per_dvm():
             continue
 
         # check that task has startup and finish times
-        exec_start = exec_stop = 0.
-        with open('%s.prof' % f_path, encoding='utf8') as fd:
-            for line in fd.readlines():
-                if 'task_exec_start' in line:
-                    exec_start = float(line.split(',')[0])
-                elif 'task_exec_stop' in line:
-                    exec_stop = float(line.split(',')[0])
+        e_times = get_event_times('%s.prof' % f_path,
+                                  ['task_exec_start', 'task_exec_stop'])
+        exec_start = e_times.get('task_exec_start', 0.)
+        exec_stop  = e_times.get('task_exec_stop', 0.)
         if not exec_start or not exec_stop:
             continue
 
@@ -137,27 +133,22 @@ def get_utilization_per_dvm():
                     break
 
         # get task data from RP task description
-        with open('%s.sl' % f_path, encoding='utf8') as fd:
-            t_data = json.loads(fd.read().replace("\'", "\""))
-        for rank in t_data['nodes']:
-            t_info['cpus'] += len(rank['core_map'][0])
-            if rank['gpu_map']:
-                t_info['gpus'] += len(rank['gpu_map'])
+        slots = read_slots('%s.sl' % f_path)
+        t_info['cpus'] = slots['cpus']
+        t_info['gpus'] = slots['gpus']
 
         # init DVM info and include task info
-        dvm_id = int(t_data['partition_id'])
+        dvm_id = slots['partition_id']
         if dvm_id not in dvm_info:
             # get DVM slots
-            hosts_file = '%s/../prrte.%03d.hosts' % (t_sandbox, dvm_id)
-            with open(hosts_file, encoding='utf8') as fd:
-                hosts = fd.read().splitlines()
-            n_hosts = len(hosts)
+            cpu_slots, gpu_slots = get_dvm_slots(
+                os.path.dirname(t_sandbox), [dvm_id], GPUS_PER_NODE)[dvm_id]
             # init DVM info
             dvm_info[dvm_id] = {
                 'start'    : exec_start,
                 'end'      : exec_stop,
-                'cpu_slots': n_hosts * int(hosts[0].split('=')[1]),
-                'gpu_slots': n_hosts * GPUS_PER_NODE,
+                'cpu_slots': cpu_slots,
+                'gpu_slots': gpu_slots,
                 'cpu_util' : 0.,  # RP OVH: place and finish task
                 'gpu_util' : 0.,  # RP OVH: place and finish task
                 'tasks'    : []
@@ -5,16 +5,29 @@ __email__     = 'info@radical-cybertools.org'
 __copyright__ = 'Copyright 2022, The RADICAL-Cybertools Team'
 __license__   = 'MIT'
 
-import glob
-import json
 import os
+import sys
 
-import statistics as st
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..'))
+from prof_parser import get_agent_profs, merge_profs  # noqa: E402
+from profiling import PROFILER  # noqa: E402
+from sketch import Sketch  # noqa: E402
+from task_table import get_task_table, get_app_start  # noqa: E402
+from utilization import get_dvm_slots, get_dvm_utilization  # noqa: E402
+from throughput import get_times, get_throughput, \
+    get_throughput_stats, SCHEDULED_EVENT, LAUNCHED_EVENT  # noqa: E402
 
 GPUS_PER_NODE = 6
 BASE_DIR = '../../data/workspace'
 LOCAL_CHECK_TIME_WINDOW = 20.
 GLOBAL_CHECK_TIME_WINDOW = 120.
+THROUGHPUT_WINDOW = 10.  # sliding window for throughput series
+THROUGHPUT_STEP = 1.
+N_WORKERS = None  # to scan task sandboxes (None - all CPUs, 1 - serial)
+PROFILE = False  # print stage timings, files/bytes read and peak RSS
 
 # SID = 'rp.session.login5.matitov.018968.0000'  # 1 DVM, 256 nodes
 # SID = 'rp.session.login3.matitov.019026.0001'  # 1 DVM, 256 nodes
@@ -25,276 +38,243 @@ GLOBAL_CHECK_TIME_WINDOW = 120.
 SID = 'rp.session.login3.matitov.019027.0000'  # 8 DVMs, 1024 nodes
 
 
+def _get_agent_profs(component):
+    # profiles of all sub-agents of the component
+    return get_agent_profs('%s/%s/pilot.0000' % (BASE_DIR, SID), component)
+
+
+def _print_sub_agents(sub_agents):
+    # per sub-agent number of tasks and rate (without idle time)
+    output = {}
+    for source in sorted(sub_agents):
+        stats = get_throughput_stats(sub_agents[source],
+                                     window=THROUGHPUT_WINDOW,
+                                     step=THROUGHPUT_STEP,
+                                     idle_gap=LOCAL_CHECK_TIME_WINDOW)
+        output[source] = (stats['count'], stats['rate'])
+    print('sub-agents (count, rate)', output)
+    return output
+
+
+@PROFILER.profiled('get_scheduling_rate')
 def get_scheduling_rate():
-    prof_file = '%s/%s/pilot.0000/agent_scheduling.0000.prof' % (BASE_DIR, SID)
+    prof_files = _get_agent_profs('agent_scheduling')
     sched_times = []  # without time gaps due to delayed submission
     sched_tasks = []
+    sub_agents = {}
     exec_pending_count = 0
     starttime = endtime = 0.
-    with open(prof_file, encoding='utf8') as fd:
-        while True:
-            line = fd.readline()
-            if not line:
-                break
+    for source, e in merge_profs(prof_files, use_mmap=True):
 
-            if not starttime:
-                if 'AGENT_SCHEDULING_PENDING,' in line:
-                    starttime = float(line.split(',')[0].strip())
+        if not starttime:
+            if e.state == 'AGENT_SCHEDULING_PENDING':
+                starttime = e.time
+            continue
+
+        if e.event == 'put' and e.state == 'AGENT_EXECUTING_PENDING':
+            exec_pending_count += 1
+            sub_agents.setdefault(source, []).append(e.time)
+            check_time = e.time
+            if endtime and (check_time - endtime) > LOCAL_CHECK_TIME_WINDOW:
+                sched_times.append(endtime - starttime)
+                last_count = 0 if not sched_tasks else sched_tasks[-1]
+                sched_tasks.append(exec_pending_count - last_count - 1)
+                starttime, endtime = check_time, 0.
                 continue
+            endtime = check_time
 
-            if 'put' in line and 'AGENT_EXECUTING_PENDING,' in line:
-                exec_pending_count += 1
-                check_time = float(line.split(',')[0].strip())
-                if endtime and (check_time - endtime) > LOCAL_CHECK_TIME_WINDOW:
-                    sched_times.append(endtime - starttime)
-                    last_count = 0 if not sched_tasks else sched_tasks[-1]
-                    sched_tasks.append(exec_pending_count - last_count - 1)
-                    starttime, endtime = check_time, 0.
-                    continue
-                endtime = check_time
-
-            elif 'unschedule_stop' in line:
-                check_time = float(line.split(',')[0].strip())
-                if (check_time - endtime) > GLOBAL_CHECK_TIME_WINDOW:
-                    sched_times.append(endtime - starttime)
-                    last_count = 0 if not sched_tasks else sched_tasks[-1]
-                    sched_tasks.append(exec_pending_count - last_count)
-                    break  # no new scheduled tasks -> break
+        elif e.event == 'unschedule_stop':
+            check_time = e.time
+            if (check_time - endtime) > GLOBAL_CHECK_TIME_WINDOW:
+                sched_times.append(endtime - starttime)
+                last_count = 0 if not sched_tasks else sched_tasks[-1]
+                sched_tasks.append(exec_pending_count - last_count)
+                break  # no new scheduled tasks -> break
 
     print('rates', [round(sched_tasks[i] / sched_times[i], 2)
                     for i in range(len(sched_times))])
+    _print_sub_agents(sub_agents)
     sched_time = sum(sched_times)
     sched_rate = round(exec_pending_count / sched_time, 2)
     return sched_time, exec_pending_count, sched_rate
     # submitted tasks for execution per sec
 
 
+@PROFILER.profiled('get_launching_rate')
 def get_launching_rate():
-    prof_file = '%s/%s/pilot.0000/agent_executing.0000.prof' % (BASE_DIR, SID)
+    prof_files = _get_agent_profs('agent_executing')
     launch_times = []
     launch_tasks = []
+    sub_agents = {}
     exec_launching_count = 0
     starttime = endtime = 0.
-    with open(prof_file, encoding='utf8') as fd:
-        while True:
-            line = fd.readline()
-            if not line:
-                break
+    for source, e in merge_profs(prof_files, use_mmap=True):
 
-            if not starttime:
-                if 'AGENT_EXECUTING_PENDING' in line:
-                    starttime = float(line.split(',')[0].strip())
-                continue
+        if not starttime:
+            if e.state == 'AGENT_EXECUTING_PENDING':
+                starttime = e.time
+            continue
 
-            if 'exec_ok' in line:
-                exec_launching_count += 1
-                check_time = float(line.split(',')[0].strip())
-                if endtime and (check_time - endtime) > LOCAL_CHECK_TIME_WINDOW:
-                    launch_times.append(endtime - starttime)
-                    last_count = 0 if not launch_tasks else launch_tasks[-1]
-                    launch_tasks.append(exec_launching_count - last_count - 1)
-                    starttime, endtime = check_time, 0.
-                    continue
-                endtime = check_time
-
-            elif 'exec_stop' in line:  # exec_stop
-                check_time = float(line.split(',')[0].strip())
-                if (check_time - endtime) > GLOBAL_CHECK_TIME_WINDOW:
-                    launch_times.append(endtime - starttime)
-                    last_count = 0 if not launch_tasks else launch_tasks[-1]
-                    launch_tasks.append(exec_launching_count - last_count)
-                    break
+        if e.event == 'exec_ok':
+            exec_launching_count += 1
+            sub_agents.setdefault(source, []).append(e.time)
+            check_time = e.time
+            if endtime and (check_time - endtime) > LOCAL_CHECK_TIME_WINDOW:
+                launch_times.append(endtime - starttime)
+                last_count = 0 if not launch_tasks else launch_tasks[-1]
+                launch_tasks.append(exec_launching_count - last_count - 1)
+                starttime, endtime = check_time, 0.
+                continue
+            endtime = check_time
+
+        elif e.event in ['exec_stop', 'task_exec_stop']:
+            check_time = e.time
+            if (check_time - endtime) > GLOBAL_CHECK_TIME_WINDOW:
+                launch_times.append(endtime - starttime)
+                last_count = 0 if not launch_tasks else launch_tasks[-1]
+                launch_tasks.append(exec_launching_count - last_count)
+                break
 
     print('rates', [round(launch_tasks[i] / launch_times[i], 2)
                     for i in range(len(launch_times))])
+    _print_sub_agents(sub_agents)
     launch_time = sum(launch_times)
     launch_rate = round(exec_launching_count / launch_time, 2)
     return launch_time, exec_launching_count, launch_rate
     # launching tasks per sec
 
 
-def get_utilization_per_dvm():
+def _get_throughput(prof_files, e_filter):
+    times = get_times(prof_files, **e_filter)
+    series = get_throughput(times,
+                            window=THROUGHPUT_WINDOW,
+                            step=THROUGHPUT_STEP)
+    stats = get_throughput_stats(times,
+                                 window=THROUGHPUT_WINDOW,
+                                 step=THROUGHPUT_STEP,
+                                 idle_gap=LOCAL_CHECK_TIME_WINDOW)
+    print('rate: %s, peak: %s, peak sustained: %s, idle time: %.2f' % (
+        stats['rate'], stats['peak'], stats['peak_sustained'],
+        stats['idle_time']))
+    print('percentiles', stats['percentiles'])
+    return series, stats
 
-    dvm_info = {}
-    # set pilot sandbox name as "<sid>.pilot"
-    for t_sandbox in glob.glob('%s/%s.pilot/task.*' % (BASE_DIR, SID)):
 
-        if not os.path.isdir(t_sandbox):
-            continue
+@PROFILER.profiled('get_scheduling_throughput')
+def get_scheduling_throughput():
+    # series of scheduled tasks per sec (window/step) and its stats
+    return _get_throughput(_get_agent_profs('agent_scheduling'),
+                           SCHEDULED_EVENT)
 
-        f_path = '%s/%s' % (t_sandbox, os.path.basename(t_sandbox))
 
-        # get only tasks that were executed
-        f_err_path, f_out_path = '%s.err' % f_path, '%s.out' % f_path
-        if (os.path.isfile(f_err_path) and not os.path.getsize(f_err_path)) or \
-                (os.path.isfile(f_out_path) and not os.path.getsize(f_out_path)):
-            continue
+@PROFILER.profiled('get_launching_throughput')
+def get_launching_throughput():
+    # series of launched tasks per sec (window/step) and its stats
+    return _get_throughput(_get_agent_profs('agent_executing'),
+                           LAUNCHED_EVENT)
 
-        # get only successfully finished tasks
-        with open('%s.err' % f_path, encoding='utf8') as fd:
-            debug_msgs = ''.join(fd.readlines())
-        if 'COMPLETED WITH STATUS 0' not in debug_msgs:
-            continue
 
-        # check that task has startup and finish times
-        exec_start = app_start = exec_stop = 0.
-        with open('%s.prof' % f_path, encoding='utf8') as fd:
-            for line in fd.readlines():
-                if 'task_exec_start' in line:
-                    exec_start = float(line.split(',')[0])
-                elif 'app_start' in line:
-                    app_start = float(line.split(',')[0])
-                elif 'task_exec_stop' in line:
-                    exec_stop = float(line.split(',')[0])
-
-        if not exec_start or not exec_stop:
-            continue
+def _print_placements(placements):
+    stats = placements.get_stats()
+    placement_values = (
+        round(stats['mean'], 2),
+        round(stats['std'], 2),
+        round(stats['min'], 2),
+        round(stats['max'], 2)
+    )
+    print('placement (s) as (mean, std, min, max): ', placement_values)
+    print('placement (s) percentiles', {
+        k: round(v, 2) for k, v in stats.items() if k.startswith('p')})
 
-        if not app_start:
-            # adjust task placement duration (subtract sleep duration)
-            with open('%s.sh' % f_path, encoding='utf8') as fd:
-                for line in fd.readlines():
-                    if line.startswith('prun'):
-                        app_start = exec_stop - int(line.split('"')[3])
-                        break
-        # (b) task placement: `os.path.getmtime('%s.out' % f_path) - exec_start`
-
-        t_info = {'cpus' : 0,
-                  'gpus' : 0,
-                  'start': exec_start,
-                  'exec' : exec_stop - exec_start,
-                  'plac' : app_start - exec_start}  # task placement to DVM
-
-        # get task data from RP task description
-        with open('%s.sl' % f_path, encoding='utf8') as fd:
-            t_data = json.loads(fd.read().replace("\'", "\""))
-        for rank in t_data['nodes']:
-            t_info['cpus'] += len(rank['core_map'][0])
-            if rank['gpu_map']:
-                t_info['gpus'] += len(rank['gpu_map'])
-
-        # init DVM info and include task info
-        dvm_id = int(t_data['partition_id'])
-        if dvm_id not in dvm_info:
-            # get DVM slots
-            hosts_file = '%s/../prrte.%03d.hosts' % (t_sandbox, dvm_id)
-            with open(hosts_file, encoding='utf8') as fd:
-                hosts = fd.read().splitlines()
-            n_hosts = len(hosts)
-            # init DVM info
-            dvm_info[dvm_id] = {
-                'start'    : exec_start,
-                'end'      : exec_stop,
-                'cpu_slots': n_hosts * int(hosts[0].split('=')[1]),
-                'gpu_slots': n_hosts * GPUS_PER_NODE,
-                'cpu_util' : 0.,  # RP OVH: place and finish task
-                'gpu_util' : 0.,  # RP OVH: place and finish task
-                'tasks'    : []
-            }
-        else:
-            if dvm_info[dvm_id]['start'] > exec_start:
-                dvm_info[dvm_id]['start'] = exec_start
-            if dvm_info[dvm_id]['end'] < exec_stop:
-                dvm_info[dvm_id]['end'] = exec_stop
-
-        dvm_info[dvm_id]['cpu_util'] += t_info['exec'] * t_info['cpus']
-        dvm_info[dvm_id]['gpu_util'] += t_info['exec'] * t_info['gpus']
-        dvm_info[dvm_id]['tasks'].append(t_info)
+
+@PROFILER.profiled('get_utilization_per_dvm')
+def get_utilization_per_dvm():
+
+    table = get_task_table(BASE_DIR, SID, n_workers=N_WORKERS)
+
+    # get only tasks that were executed and successfully finished, which have
+    # startup and finish times (files `.err` and `.out` are not empty)
+    selected = (table['err_size'] != 0) & (table['out_size'] != 0) & \
+               (table['status'] == 0) & \
+               (table['exec_start'] != 0.) & (table['exec_stop'] != 0.)
+    # (b) task placement: `os.path.getmtime('%s.out' % f_path) - exec_start`
+
+    exec_start = table['exec_start'][selected]
+    app_start  = get_app_start(table)[selected]
+    dvm_ids    = table['partition_id'][selected]
+
+    # get DVM slots
+    dvm_slots = get_dvm_slots('%s/%s.pilot' % (BASE_DIR, SID),
+                              np.unique(dvm_ids), GPUS_PER_NODE)
+    dvm_info = get_dvm_utilization(table, dvm_slots, selected=selected)
+    for dvm_id, d in dvm_info.items():
+        dvm_tasks = dvm_ids == dvm_id
+        # task placement to DVM
+        d['plac'] = Sketch().update(app_start[dvm_tasks] -
+                                    exec_start[dvm_tasks])
 
     output_reformatted = {}
-    output_placements = []
+    output_placements = Sketch()  # merged per DVM placements
+    output_idle = {}  # idle slot-seconds (cpu, gpu) during DVM lifetime
 
     total_tasks_count = 0
     for idx, d in dvm_info.items():
-        n_tasks = len(d['tasks'])
-        exec_dvm = d['end'] - d['start']
-        placements = [t['plac'] for t in d['tasks']]
-        mu_placements = st.mean(placements)
+        n_tasks = d['plac'].count
+        placements = d['plac']
         print('%03g - %s - cpu util: %s, gpu util: %s, placement (s): %s %s' % (
             idx,
             n_tasks,
-            round(d['cpu_util'] / (d['cpu_slots'] * exec_dvm), 2),
-            round(d['gpu_util'] / (d['gpu_slots'] * exec_dvm), 2),
-            round(mu_placements, 2),
-            round(st.pstdev(placements, mu_placements), 2),
+            round(d['cpu_util'], 2),
+            round(d['gpu_util'], 2),
+            round(placements.moments.mean, 2),
+            round(placements.moments.std, 2),
         ))
         total_tasks_count += n_tasks
 
         output_reformatted[idx] = {
             'tasks': n_tasks,
-            'cpu': round(d['cpu_util'] / (d['cpu_slots'] * exec_dvm), 2),
-            'gpu': round(d['gpu_util'] / (d['gpu_slots'] * exec_dvm), 2)
+            'cpu': round(d['cpu_util'], 2),
+            'gpu': round(d['gpu_util'], 2)
         }
-        output_placements.extend(placements)
+        output_idle[idx] = (round(d['cpu_idle'], 2), round(d['gpu_idle'], 2))
+        output_placements.merge(placements)
     print('num dvms: %s | num tasks: %s' % (len(dvm_info), total_tasks_count))
-    mu_placements = st.mean(output_placements)
-    placement_values = (
-        round(mu_placements, 2),
-        round(st.pstdev(output_placements, mu_placements), 2),
-        round(min(output_placements), 2),
-        round(max(output_placements), 2)
-    )
-    print('placement (s) as (mean, std, min, max): ', placement_values)
+    _print_placements(output_placements)
     print(output_reformatted)
-    print(output_placements)
+    print('idle slots (s) as (cpu, gpu): ', output_idle)
 
 
+@PROFILER.profiled('get_placement_times')
 def get_placement_times():
 
-    output_placements = []
-    # set pilot sandbox name as "<sid>.pilot"
-    for t_sandbox in glob.glob('%s/%s.pilot/task.*' % (BASE_DIR, SID)):
+    table = get_task_table(BASE_DIR, SID, n_workers=N_WORKERS)
 
-        if not os.path.isdir(t_sandbox):
-            continue
-
-        f_path = '%s/%s' % (t_sandbox, os.path.basename(t_sandbox))
+    # get only FAILED tasks, which were executed and have startup time
+    selected = (table['err_size'] != 0) & (table['out_size'] != 0) & \
+               (table['status'] != 0) & \
+               ((table['exec_start'] != 0.) | (table['app_start'] != 0.))
 
-        # get only tasks that were executed
-        f_err_path, f_out_path = '%s.err' % f_path, '%s.out' % f_path
-        if (os.path.isfile(f_err_path) and not os.path.getsize(f_err_path)) or \
-                (os.path.isfile(f_out_path) and not os.path.getsize(f_out_path)):
-            continue
-
-        # get only FAILED tasks
-        with open('%s.err' % f_path, encoding='utf8') as fd:
-            debug_msgs = ''.join(fd.readlines())
-        if 'COMPLETED WITH STATUS 0' in debug_msgs:
-            continue
-
-        # check that task has startup and finish times
-        exec_start = app_start = 0.
-        with open('%s.prof' % f_path, encoding='utf8') as fd:
-            for line in fd.readlines():
-                if 'task_exec_start' in line:
-                    exec_start = float(line.split(',')[0])
-                elif 'app_start' in line:
-                    app_start = float(line.split(',')[0])
-
-        if not exec_start and not app_start:
-            continue
-
-        output_placements.append(app_start - exec_start)
-        print(app_start - exec_start)
-
-    mu_placements = st.mean(output_placements)
-    placement_values = (
-        round(mu_placements, 2),
-        round(st.pstdev(output_placements, mu_placements), 2),
-        round(min(output_placements), 2),
-        round(max(output_placements), 2)
-    )
-    print('placement (s) as (mean, std, min, max): ', placement_values)
-    print(len(output_placements), output_placements)
+    output_placements = Sketch().update(table['app_start'][selected] -
+                                        table['exec_start'][selected])
+    _print_placements(output_placements)
+    print('num tasks: %s' % output_placements.count)
 
 
 # ------------------------------------------------------------------------------
 #
 if __name__ == '__main__':
 
+    if PROFILE:
+        PROFILER.enable()
+
     # print(get_scheduling_rate())
     # print(get_launching_rate())
+    # get_scheduling_throughput()
+    # get_launching_throughput()
     # get_utilization_per_dvm()
     get_placement_times()
 
+    if PROFILE:
+        print(PROFILER.to_json())
+
 # ------------------------------------------------------------------------------
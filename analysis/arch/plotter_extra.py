@@ -1,6 +1,10 @@
 
-import glob
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..'))
+from extrapolation import get_session_projection, FINISHED  # noqa: E402
 
 # current - 6426.77; extrapolated exec_stop: 8890.28
 # s_key = n1024_dvm8_r2
@@ -8,65 +12,33 @@ import os
 
 class Plotter:
 
-    def __init__(self, input_dir, plots_dir, sessions, save=False):
+    def __init__(self, input_dir, plots_dir, sessions, save=False,
+                 n_workers=None):
 
         self.input_dir = input_dir
         self.plots_dir = plots_dir
         self.sessions  = sessions
         self.save      = save
+        self.n_workers = n_workers
         self.data      = {}
 
     def get_extrapolated_exec_stop_time(self, s_key):
 
-        def _zero_file(_path):
-            return not os.path.isfile(_path) or not os.path.getsize(_path)
-
-        exec_stop_times = []
-        count = 0
-        sid = self.sessions[s_key]['sid']
-
-        # set pilot sandbox name as "<sid>.pilot"
-        s_path = '%s/%s.pilot/task.*' % (self.input_dir, sid)
-        for t_sandbox in glob.glob(s_path):
-
-            if not os.path.isdir(t_sandbox):
-                continue
-
-            f_path = '%s/%s' % (t_sandbox, os.path.basename(t_sandbox))
-
-            # get only tasks that were executed
-            f_err_path, f_out_path = '%s.err' % f_path, '%s.out' % f_path
-            if _zero_file(f_err_path) or _zero_file(f_out_path):
-                continue
-
-            # check all tasks
-
-            app_start = exec_stop = 0.
-            with open('%s.prof' % f_path, encoding='utf8') as fd:
-                for line in fd.readlines():
-                    if 'app_start' in line:
-                        app_start = float(line.split(',')[0])
-                    elif 'task_exec_stop' in line:
-                        exec_stop = float(line.split(',')[0])
-
-            if exec_stop:
-                exec_stop_times.append(exec_stop)
-                continue
-            elif not app_start:
-                continue
-
-            with open('%s.sh' % f_path, encoding='utf8') as fd:
-                for line in fd.readlines():
-                    if line.startswith('prun'):
-                        exec_stop = app_start + int(line.split('"')[3])
-                        print(exec_stop - 1645116655.9211390)
-                        count += 1
-                        break
-
-            if exec_stop: #and exec_stop < 1645121155.921139:
-                exec_stop_times.append(exec_stop)
-
-        return max(exec_stop_times), count
+        projected, summary = get_session_projection(
+            self.input_dir, self.sessions[s_key]['sid'],
+            n_workers=self.n_workers)
+        self.data[s_key] = projected
+
+        # extrapolated `exec_stop` for tasks that didn't finish (including
+        # tasks that never started)
+        extrapolated = projected['state'] != FINISHED
+        count = int(extrapolated.sum())
+        print('makespan (s) - observed: %s, projected: %s' % (
+            summary['observed_makespan'], summary['projected_makespan']))
+        print('projected utilization - cpu: %s, gpu: %s' % (
+            summary['cpu_util'], summary['gpu_util']))
+
+        return float(projected['exec_stop'].max()), count
 
 
 if __name__ == '__main__':
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__email__     = 'info@radical-cybertools.org'
+__copyright__ = 'Copyright 2022, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Vectorized concurrency engine: start/stop timestamps of every phase are
+extracted once per session (single pass over entities' events), and the
+number of concurrent entities per phase is computed over sorted timestamps
+with cumulative counts (`np.searchsorted`).
+"""
+
+import numpy as np
+
+
+def _match(event, e_filter):
+    for key, value in e_filter.items():
+        if event[key] != value:
+            return False
+    return True
+
+
+def get_phase_ranges(entities, phases):
+    """
+    Return `{phase_name: (starts, stops)}` for phases defined as
+    `{phase_name: [start_event_filter, stop_event_filter]}` (the same format
+    as for `ra.Session.concurrency`), where the range of the phase of the
+    entity is defined by the first start event and the first stop event that
+    comes after it.
+    """
+    ranges = {p_name: ([], []) for p_name in phases}
+    for entity in entities:
+
+        t_start = dict.fromkeys(phases)
+        t_stop  = dict.fromkeys(phases)
+        for event in entity.events:
+            for p_name, (start_filter, stop_filter) in phases.items():
+                if t_stop[p_name] is not None:
+                    continue
+                if t_start[p_name] is None:
+                    if _match(event, start_filter):
+                        t_start[p_name] = event[0]
+                        # start and stop events might be the same
+                        if _match(event, stop_filter):
+                            t_stop[p_name] = event[0]
+                elif _match(event, stop_filter):
+                    t_stop[p_name] = event[0]
+
+        for p_name in phases:
+            if t_start[p_name] is not None and t_stop[p_name] is not None:
+                ranges[p_name][0].append(t_start[p_name])
+                ranges[p_name][1].append(t_stop[p_name])
+
+    return {p_name: (np.array(starts, dtype=np.float64),
+                     np.array(stops, dtype=np.float64))
+            for p_name, (starts, stops) in ranges.items()}
+
+
+def get_concurrency(starts, stops, sampling=None, t_range=None):
+    """
+    Return `(times, counts)` - number of ranges that include the time point,
+    i.e., `start <= t <= stop`. Time points are either all distinct range
+    boundaries (`sampling=None`, exact event resolution) or a grid with the
+    step `sampling` over `t_range` (whole time span of ranges by default).
+    """
+    starts = np.sort(np.asarray(starts, dtype=np.float64))
+    stops  = np.sort(np.asarray(stops, dtype=np.float64))
+
+    if not starts.size:
+        return np.array([], dtype=np.float64), np.array([], dtype=np.int64)
+
+    if sampling:
+        t_min, t_max = t_range or (starts[0], stops[-1])
+        times = np.arange(t_min, t_max + sampling, sampling)
+    else:
+        times = np.union1d(starts, stops)
+
+    counts = np.searchsorted(starts, times, side='right') - \
+        np.searchsorted(stops, times, side='left')
+    return times, counts
+
+
+def get_max_concurrency(time_series):
+    """
+    Return maximum concurrency per phase, `{phase_name: max_count}`.
+    """
+    return {p_name: int(counts.max()) if counts.size else 0
+            for p_name, (_, counts) in time_series.items()}
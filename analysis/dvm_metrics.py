@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__email__     = 'info@radical-cybertools.org'
+__copyright__ = 'Copyright 2022, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+DVM lifecycle metrics: agent logs and profiles of the session are scanned
+once (in parallel per file) for DVM startup (`dvm_start`, `dvm_ready`) and
+termination (`terminating prte`, `TERMINATING DVM...DONE`) events, which are
+matched by DVM id. Startup and termination times are reported per DVM and
+aggregated per DVM size (number of nodes). Events without DVM id can't be
+matched, they are reported separately (as counts per event kind).
+
+    python dvm_metrics.py -i ../data/workspace <sid> [<sid> ...]
+"""
+
+import argparse
+import glob
+import os
+import re
+import warnings
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from prof_parser import read_prof
+from utilization import read_dvm_hosts
+
+DVM_ID_RE = re.compile(r'dvm_id[\s=:]*(\d+)')
+
+# event kind: profile event name or substring of the log message
+PROF_EVENTS = {'start'     : 'dvm_start',
+               'ready'     : 'dvm_ready'}
+LOG_EVENTS  = {'term_start': 'terminating prte',
+               'term_stop' : 'TERMINATING DVM...DONE'}
+
+# metric: (start event kind, stop event kind)
+METRICS = {'startup'    : ('start', 'ready'),
+           'termination': ('term_start', 'term_stop')}
+
+
+def _get_dvm_id(msg):
+    match = DVM_ID_RE.search(msg)
+    return int(match.group(1)) if match else None
+
+
+def scan_file(f_path):
+    """
+    Return `[(event_kind, dvm_id, time), ...]` found in the log or profile
+    (`dvm_id` is `None` if it is not reported).
+    """
+    events = []
+    if f_path.endswith('.prof'):
+        e_kinds = {e_name: kind for kind, e_name in PROF_EVENTS.items()}
+        for e in read_prof(f_path, events=e_kinds):
+            events.append((e_kinds[e.event], _get_dvm_id(e.msg), e.time))
+        return events
+
+    with open(f_path, encoding='utf8', errors='replace') as fd:
+        for line in fd:
+            for kind, pattern in LOG_EVENTS.items():
+                if pattern in line:
+                    # log line: `<time> : <component> : ... : <message>`,
+                    # lines without timestamp (e.g., tracebacks) are skipped
+                    try:
+                        e_time = float(line.split(':', 1)[0])
+                    except ValueError:
+                        break
+                    events.append((kind, _get_dvm_id(line), e_time))
+                    break
+    return events
+
+
+def get_session_files(session_dir):
+    return sorted(glob.glob('%s/**/*.log' % session_dir, recursive=True) +
+                  glob.glob('%s/**/*.prof' % session_dir, recursive=True))
+
+
+def get_dvm_events(session_dir, n_workers=None):
+    """
+    Return `({dvm_id: {event_kind: time}}, {event_kind: [time, ...]})` -
+    events matched by DVM id, and events without DVM id (not matched).
+    """
+    f_paths = get_session_files(session_dir)
+    events  = []
+    if n_workers == 1:
+        for f_events in map(scan_file, f_paths):
+            events.extend(f_events)
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            for f_events in executor.map(scan_file, f_paths):
+                events.extend(f_events)
+
+    dvms   = {}
+    no_ids = {}
+    for kind, dvm_id, e_time in sorted(events, key=lambda x: x[2]):
+        if dvm_id is None:
+            no_ids.setdefault(kind, []).append(e_time)
+        else:
+            # the first occurrence of the event per DVM is kept
+            dvms.setdefault(dvm_id, {}).setdefault(kind, e_time)
+
+    return dvms, no_ids
+
+
+def get_dvm_metrics(input_dir, sid, n_workers=None):
+    """
+    Return per DVM metrics `{dvm_id: {'nodes': int, 'startup': float,
+    'termination': float}}` (metrics are `None` if events are missing, and
+    number of nodes is `None` if the DVM hosts file is not available).
+    """
+    dvm_events, no_ids = get_dvm_events(os.path.join(input_dir, sid),
+                                        n_workers=n_workers)
+    pilot_sandbox = os.path.join(input_dir, '%s.pilot' % sid)
+    if no_ids:
+        warnings.warn('%s - events without DVM id are skipped: %s' % (
+            sid, {kind: len(e_times) for kind, e_times in no_ids.items()}))
+
+    output = {}
+    for dvm_id in sorted(dvm_events):
+        events = dvm_events[dvm_id]
+        try:
+            n_nodes = len(read_dvm_hosts(pilot_sandbox, dvm_id))
+        except OSError:
+            n_nodes = None
+        output[dvm_id] = {'nodes': n_nodes}
+        for metric, (start, stop) in METRICS.items():
+            output[dvm_id][metric] = events[stop] - events[start] \
+                if start in events and stop in events else None
+    return output
+
+
+def get_aggregated_metrics(dvm_metrics):
+    """
+    Return `{dvm_size: {metric: (count, mean, min, max)}}`, where `dvm_size`
+    is the number of nodes per DVM (`all` - for all DVMs).
+    """
+    sizes  = sorted(set(m['nodes'] for m in dvm_metrics.values()
+                        if m['nodes'] is not None))
+    output = {}
+    for size in ['all'] + sizes:
+        output[size] = {}
+        for metric in METRICS:
+            values = np.array([m[metric] for m in dvm_metrics.values()
+                               if m[metric] is not None and
+                               size in ['all', m['nodes']]])
+            output[size][metric] = (int(values.size),
+                                    round(float(values.mean()), 2),
+                                    round(float(values.min()), 2),
+                                    round(float(values.max()), 2)) \
+                if values.size else (0, None, None, None)
+    return output
+
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-i', '--input_dir', default='../data/workspace')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='Number of worker processes (default: all CPUs)')
+    parser.add_argument('-v', '--verbose', action='store_true', default=False,
+                        help='Print metrics per DVM')
+    parser.add_argument('sids', nargs='+')
+    opts = parser.parse_args()
+
+    for _sid in opts.sids:
+        _metrics = get_dvm_metrics(opts.input_dir, _sid,
+                                   n_workers=opts.workers)
+        print(_sid)
+        if opts.verbose:
+            for _dvm_id, _m in _metrics.items():
+                print('  %03d - nodes: %s, startup: %s, termination: %s' % (
+                    _dvm_id, _m['nodes'], _m['startup'], _m['termination']))
+        for _size, _aggr in get_aggregated_metrics(_metrics).items():
+            print('  DVM size (nodes): %s' % _size)
+            for _metric, (_count, _mean, _min, _max) in _aggr.items():
+                if _count:
+                    print('    DVM %s time (avg): %.2f sec '
+                          '(min: %.2f, max: %.2f, DVMs: %s)' % (
+                              _metric, _mean, _min, _max, _count))
+
+# ------------------------------------------------------------------------------
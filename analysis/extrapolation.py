@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__email__     = 'info@radical-cybertools.org'
+__copyright__ = 'Copyright 2022, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Projected timeline of sessions truncated by the walltime: for tasks that
+didn't finish, execution windows are extrapolated from the task table
+(with setup/termination overheads measured on finished tasks), and tasks
+that never started are replayed onto slots of their DVMs as soon as they are
+freed by running tasks. Projected makespan and utilization are derived from
+the complete timeline.
+
+    python extrapolation.py -i ../data/workspace <sid> [<sid> ...]
+"""
+
+import argparse
+import heapq
+import json
+
+import numpy as np
+
+from task_table  import get_task_table
+from utilization import get_dvm_slots, get_dvm_utilization
+
+# task states at the end of the session
+FINISHED    = 0
+RUNNING     = 1  # application started
+SETUP       = 2  # execution started, placement by PRRTE isn't finished
+NOT_STARTED = 3
+
+STATE_NAMES = {FINISHED   : 'finished',
+               RUNNING    : 'running',
+               SETUP      : 'setup',
+               NOT_STARTED: 'not_started'}
+
+
+def _median(values, default=0.):
+    return float(np.median(values)) if values.size else default
+
+
+def get_overheads(table):
+    """
+    Return median `setup` (task_exec_start -> app_start) and `term`
+    (app_start + runtime -> task_exec_stop) durations of finished tasks.
+    """
+    finished = (table['exec_stop'] != 0.) & (table['app_start'] != 0.) & \
+        (table['exec_start'] != 0.)
+    with_sleep = finished & (table['sleep'] >= 0)
+    return {
+        'setup': _median(table['app_start'][finished] -
+                         table['exec_start'][finished]),
+        'term' : max(_median(table['exec_stop'][with_sleep] -
+                             table['app_start'][with_sleep] -
+                             table['sleep'][with_sleep]), 0.)}
+
+
+def get_last_time(table):
+    # the latest timestamp observed in the session
+    return float(max(table[c].max() if table[c].size else 0.
+                     for c in ['exec_start', 'app_start', 'app_stop',
+                               'exec_stop']))
+
+
+def get_states(table):
+    states = np.full(table['uid'].size, NOT_STARTED, dtype=np.int8)
+    states[table['exec_start'] != 0.] = SETUP
+    states[(table['app_start'] != 0.) & (states == SETUP)] = RUNNING
+    states[table['exec_stop'] != 0.] = FINISHED
+    return states
+
+
+def _replay(projected, idx_pending, dvm_slots, t_now):
+    # tasks are started in the order of their ids at the earliest time, when
+    # the DVM has enough free slots (tasks without DVM go to the DVM, which
+    # can start them first)
+    busy = np.flatnonzero(projected['exec_stop'] > t_now)
+    dvms = {}
+    for dvm_id, (cpu_slots, gpu_slots) in dvm_slots.items():
+        in_dvm = busy[projected['partition_id'][busy] == dvm_id]
+        heap   = list(zip(projected['exec_stop'][in_dvm].tolist(),
+                          projected['cpus'][in_dvm].tolist(),
+                          projected['gpus'][in_dvm].tolist()))
+        heapq.heapify(heap)
+        dvms[dvm_id] = {'time'    : t_now,
+                        'free_cpu': cpu_slots - sum(h[1] for h in heap),
+                        'free_gpu': gpu_slots - sum(h[2] for h in heap),
+                        'running' : heap}
+
+    def _get_start_time(_dvm, _cpus, _gpus, _release=False):
+        t_start = _dvm['time']
+        running = _dvm['running'] if _release else list(_dvm['running'])
+        free_cpu, free_gpu = _dvm['free_cpu'], _dvm['free_gpu']
+        # a task larger than the DVM is started once the DVM is empty
+        while (free_cpu < _cpus or free_gpu < _gpus) and running:
+            t_stop, cpus, gpus = heapq.heappop(running)
+            free_cpu += cpus
+            free_gpu += gpus
+            t_start   = max(t_start, t_stop)
+        if _release:
+            _dvm['time']     = t_start
+            _dvm['free_cpu'] = free_cpu - _cpus
+            _dvm['free_gpu'] = free_gpu - _gpus
+        return t_start
+
+    for idx in idx_pending:
+        cpus = int(projected['cpus'][idx])
+        gpus = int(projected['gpus'][idx])
+
+        dvm_id = int(projected['partition_id'][idx])
+        if dvm_id not in dvms:
+            dvm_id = min(dvms, key=lambda d: _get_start_time(dvms[d], cpus,
+                                                              gpus))
+        t_start = _get_start_time(dvms[dvm_id], cpus, gpus, _release=True)
+        t_stop  = t_start + projected['duration'][idx]
+        heapq.heappush(dvms[dvm_id]['running'], (t_stop, cpus, gpus))
+
+        projected['partition_id'][idx] = dvm_id
+        projected['exec_start'][idx]   = t_start
+        projected['exec_stop'][idx]    = t_stop
+
+
+def project_timeline(table, dvm_slots, t_now=None, overheads=None):
+    """
+    Return the projected task table (`uid`, `state`, `exec_start`,
+    `exec_stop`, `cpus`, `gpus`, `partition_id`), where execution windows of
+    tasks that didn't finish by `t_now` (the latest observed timestamp by
+    default) are extrapolated.
+    """
+    overheads = overheads or get_overheads(table)
+    states    = get_states(table)
+
+    if t_now is None:
+        t_now = get_last_time(table)
+
+    # unknown attributes of not started tasks are taken as medians
+    cpus  = table['cpus'].astype(np.int64)
+    gpus  = table['gpus'].astype(np.int64)
+    sleep = table['sleep'].astype(np.float64)
+    for values in [cpus, gpus, sleep]:
+        known = values >= 0
+        values[~known] = _median(values[known]) if known.any() else 0
+
+    projected = {'uid'         : table['uid'],
+                 'state'       : states,
+                 'exec_start'  : table['exec_start'].copy(),
+                 'exec_stop'   : table['exec_stop'].copy(),
+                 'cpus'        : cpus,
+                 'gpus'        : gpus,
+                 'partition_id': table['partition_id'].astype(np.int64),
+                 'duration'    : overheads['setup'] + sleep +
+                                 overheads['term']}
+
+    running = states == RUNNING
+    projected['exec_stop'][running] = np.maximum(
+        table['app_start'][running] + sleep[running] + overheads['term'],
+        t_now)
+
+    setup = states == SETUP
+    projected['exec_stop'][setup] = np.maximum(
+        table['exec_start'][setup] + projected['duration'][setup], t_now)
+
+    idx_pending = np.flatnonzero(states == NOT_STARTED)
+    if idx_pending.size and dvm_slots:
+        _replay(projected, idx_pending, dvm_slots, t_now)
+
+    del projected['duration']
+    return projected
+
+
+def get_projection_summary(projected, dvm_slots, t_now):
+    """
+    Return observed (till `t_now`) and projected makespan (from the first
+    task start), number of tasks per state, and projected utilization
+    (overall and per DVM).
+    """
+    started = projected['exec_start'] != 0.
+    t_start = float(projected['exec_start'][started].min()) \
+        if started.any() else 0.
+    t_end   = float(projected['exec_stop'].max()) if started.any() else 0.
+
+    dvm_util = get_dvm_utilization(projected, dvm_slots, selected=started) \
+        if dvm_slots else {}
+    makespan = t_end - t_start
+    cpu_slots = sum(s[0] for s in dvm_slots.values())
+    gpu_slots = sum(s[1] for s in dvm_slots.values())
+
+    def _util(_busy, _slots):
+        return round(_busy / (_slots * makespan), 4) \
+            if _slots and makespan else 0.
+
+    return {
+        'observed_makespan' : round(t_now - t_start, 2),
+        'projected_makespan': round(makespan, 2),
+        'tasks'             : {name: int((projected['state'] == state).sum())
+                               for state, name in STATE_NAMES.items()},
+        'cpu_util'          : _util(sum(d['cpu_busy']
+                                        for d in dvm_util.values()),
+                                    cpu_slots),
+        'gpu_util'          : _util(sum(d['gpu_busy']
+                                        for d in dvm_util.values()),
+                                    gpu_slots),
+        'dvms'              : {dvm_id: {'end'     : round(d['end'] - t_start,
+                                                          2),
+                                        'cpu_util': round(d['cpu_util'], 4),
+                                        'gpu_util': round(d['gpu_util'], 4)}
+                               for dvm_id, d in dvm_util.items()}
+    }
+
+
+def get_session_projection(input_dir, sid, n_workers=1):
+    """
+    Return the projected task table and its summary for the session.
+    """
+    table = get_task_table(input_dir, sid, n_workers=n_workers)
+
+    dvm_ids   = np.unique(table['partition_id'][table['partition_id'] >= 0])
+    dvm_slots = get_dvm_slots('%s/%s.pilot' % (input_dir, sid), dvm_ids)
+
+    t_now     = get_last_time(table)
+    projected = project_timeline(table, dvm_slots, t_now=t_now)
+    return projected, get_projection_summary(projected, dvm_slots, t_now)
+
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-i', '--input_dir', default='../data/workspace')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='Number of worker processes to build task tables')
+    parser.add_argument('sids', nargs='+')
+    opts = parser.parse_args()
+
+    for _sid in opts.sids:
+        _, _summary = get_session_projection(opts.input_dir, _sid,
+                                             n_workers=opts.workers)
+        print(_sid)
+        print(json.dumps(_summary, indent=4))
+
+# ------------------------------------------------------------------------------
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__email__     = 'info@radical-cybertools.org'
+__copyright__ = 'Copyright 2022, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Per-task latency waterfall: timestamps of task events from the client, agent
+staging input and agent scheduler profiles are collected once per session
+into an event table (`<sid>.events.npz`, rebuilt only if profiles have
+changed), joined with the task table, and split into consecutive phases:
+
+    submission -> AGENT_SCHEDULING -> schedule_ok -> task_exec_start ->
+    app_start -> app_stop -> task_exec_stop -> unschedule_stop
+
+Phase statistics are aggregated per task size class, and the critical path
+(the task that finishes last) is decomposed into phases.
+
+    python latency.py -i ../data/workspace <sid> [<sid> ...]
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+
+import numpy as np
+
+from prof_parser import get_agent_profs, merge_profs
+from sketch      import Sketch
+from task_table  import get_task_table, get_app_start
+
+EVENT_TABLE_FILE_NAME = '%s.events.npz'
+EVENT_TABLE_VERSION   = 2
+
+# columns of the event table: (column name, event name(s), state, is first);
+# staging input reports tasks passed to the scheduler with `advance` or `put`
+EVENT_COLUMNS = [
+    ('submission'     , 'advance'        , 'NEW'                     , True ),
+    ('agent_arrival'  , ['advance', 'put'], 'AGENT_SCHEDULING_PENDING', True),
+    ('sched_start'    , 'advance'        , 'AGENT_SCHEDULING'        , True ),
+    ('schedule_ok'    , 'schedule_ok'    , None                      , True ),
+    ('unschedule_stop', 'unschedule_stop', None                      , False)
+]
+
+# (phase name, start column, stop column)
+PHASES = [
+    ('queue'       , 'submission'     , 'sched_start'    ),
+    ('scheduling'  , 'sched_start'    , 'schedule_ok'    ),
+    ('launching'   , 'schedule_ok'    , 'exec_start'     ),
+    ('placement'   , 'exec_start'     , 'app_start'      ),
+    ('running'     , 'app_start'      , 'app_stop'       ),
+    ('termination' , 'app_stop'       , 'exec_stop'      ),
+    ('unscheduling', 'exec_stop'      , 'unschedule_stop')
+]
+
+SMALL_TASK_MAX_CPUS = 21  # up to one socket size (`CPUS_RANGE_S`)
+
+
+def get_event_table_path(input_dir, sid):
+    return os.path.join(input_dir, EVENT_TABLE_FILE_NAME % sid)
+
+
+def get_event_profs(session_dir):
+    # client (task manager), agent staging input (tasks arrive at the agent)
+    # and agent scheduler profiles
+    agent_sandbox = '%s/pilot.0000' % session_dir
+    return sorted(glob.glob('%s/tmgr.*.prof' % session_dir)) + \
+        get_agent_profs(agent_sandbox, 'agent_staging_input') + \
+        get_agent_profs(agent_sandbox, 'agent_scheduling')
+
+
+def get_fingerprint(prof_paths):
+    f_stats = [(os.path.basename(p), os.stat(p).st_size,
+                os.stat(p).st_mtime_ns) for p in prof_paths]
+    return np.array([EVENT_TABLE_VERSION, len(f_stats),
+                     sum(s[1] for s in f_stats),
+                     max([s[2] for s in f_stats] or [0])], dtype=np.int64)
+
+
+def build_event_table(prof_paths):
+    e_filter = {}
+    for idx, (_, e_names, state, is_first) in enumerate(EVENT_COLUMNS):
+        if isinstance(e_names, str):
+            e_names = [e_names]
+        for e_name in e_names:
+            e_filter[(e_name, state)] = (idx, is_first)
+    events = set(e_name for e_name, _ in e_filter)
+
+    times = {}
+    for _, e in merge_profs(prof_paths, events=events):
+        # events with any state are keyed by `(event, None)`
+        key = (e.event, e.state)
+        if key not in e_filter:
+            key = (e.event, None)
+        if key not in e_filter or not e.uid.startswith('task.'):
+            continue
+        idx, is_first = e_filter[key]
+        t_times = times.setdefault(e.uid, [0.] * len(EVENT_COLUMNS))
+        if not is_first or not t_times[idx]:
+            t_times[idx] = e.time
+
+    uids = sorted(times)
+    table = {'uid': np.array(uids, dtype=str)}
+    for idx, (name, _, _, _) in enumerate(EVENT_COLUMNS):
+        table[name] = np.array([times[uid][idx] for uid in uids],
+                               dtype=np.float64)
+    # agent arrival is the submission time, if client profiles are missing
+    no_submission = table['submission'] == 0.
+    table['submission'][no_submission] = table['agent_arrival'][no_submission]
+    return table
+
+
+def get_event_table(input_dir, sid, rebuild=False):
+    """
+    Return event table (client and agent events) of the session as a dict
+    of NumPy arrays.
+    """
+    table_path  = get_event_table_path(input_dir, sid)
+    prof_paths  = get_event_profs(os.path.join(input_dir, sid))
+    fingerprint = get_fingerprint(prof_paths)
+
+    if not rebuild and os.path.isfile(table_path):
+        with np.load(table_path) as data:
+            if np.array_equal(data['_fingerprint'], fingerprint):
+                return {name: data[name]
+                        for name in ['uid'] + [c[0] for c in EVENT_COLUMNS]}
+
+    table = build_event_table(prof_paths)
+    np.savez(table_path, _fingerprint=fingerprint, **table)
+    return table
+
+
+def get_size_classes(cpus, gpus):
+    # tasks without slots (`cpus == -1`, e.g., not scheduled) are `unknown`
+    size_classes = np.where(cpus > SMALL_TASK_MAX_CPUS, 'large', 'small')
+    size_classes = np.char.add(size_classes, np.where(gpus > 0, '_gpu', ''))
+    return np.where(cpus < 0, 'unknown', size_classes)
+
+
+def get_waterfall(input_dir, sid, n_workers=1, table=None):
+    """
+    Return per-task timestamps of all events, size class and phase durations
+    (`NaN` if any of phase events is missing) as a dict of NumPy arrays,
+    ordered as the task table (`table`, if it is already loaded).
+    """
+    if table is None:
+        table = get_task_table(input_dir, sid, n_workers=n_workers)
+    events = get_event_table(input_dir, sid)
+
+    waterfall = {'uid'       : table['uid'],
+                 'size_class': get_size_classes(table['cpus'],
+                                                table['gpus']),
+                 'exec_start': table['exec_start'],
+                 'app_start' : get_app_start(table),
+                 'app_stop'  : table['app_stop'],
+                 'exec_stop' : table['exec_stop']}
+
+    # tasks of the task table that are in the event table
+    idx   = np.searchsorted(events['uid'], table['uid'])
+    found = idx < events['uid'].size
+    found[found] = events['uid'][idx[found]] == table['uid'][found]
+    for name, _, _, _ in EVENT_COLUMNS:
+        waterfall[name] = np.zeros(table['uid'].size, dtype=np.float64)
+        waterfall[name][found] = events[name][idx[found]]
+
+    for p_name, start, stop in PHASES:
+        is_set = (waterfall[start] != 0.) & (waterfall[stop] != 0.)
+        waterfall[p_name] = np.where(is_set,
+                                     waterfall[stop] - waterfall[start],
+                                     np.nan)
+    return waterfall
+
+
+def get_phase_stats(waterfall, quantiles=None):
+    """
+    Return `{size_class: {phase: stats}}` with statistics of phase durations
+    per size class and for all tasks (`all`).
+    """
+    size_classes = waterfall['size_class']
+    output = {}
+    for s_class in ['all'] + sorted(np.unique(size_classes).tolist()):
+        selected = np.ones(size_classes.size, dtype=bool) \
+            if s_class == 'all' else size_classes == s_class
+        output[s_class] = {}
+        for p_name, _, _ in PHASES:
+            durations = waterfall[p_name][selected]
+            durations = durations[~np.isnan(durations)]
+            output[s_class][p_name] = Sketch().update(durations).get_stats(
+                quantiles)
+    return output
+
+
+def get_critical_path(waterfall):
+    """
+    Return phases of the task that finishes last (from the submission of the
+    first task), and the phase that dominates the makespan.
+    """
+    submitted = waterfall['submission'][waterfall['submission'] != 0.]
+    t_end = np.maximum(waterfall['exec_stop'], waterfall['unschedule_stop'])
+    if not submitted.size or not t_end.size or not t_end.max():
+        return {}
+
+    idx = int(np.argmax(t_end))
+    t_first = float(submitted.min())
+
+    phases = {'wait': float(waterfall['submission'][idx] - t_first)}
+    for p_name, _, _ in PHASES:
+        if not np.isnan(waterfall[p_name][idx]):
+            phases[p_name] = float(waterfall[p_name][idx])
+
+    return {'uid'       : str(waterfall['uid'][idx]),
+            'size_class': str(waterfall['size_class'][idx]),
+            'makespan'  : float(t_end[idx] - t_first),
+            'phases'    : phases,
+            'dominant'  : max(phases, key=phases.get)}
+
+
+def _nan_to_none(obj):
+    # `NaN` (e.g., stats of phases without durations) is not valid JSON
+    if isinstance(obj, dict):
+        return {k: _nan_to_none(v) for k, v in obj.items()}
+    if isinstance(obj, float) and math.isnan(obj):
+        return None
+    return obj
+
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-i', '--input_dir', default='../data/workspace')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='Number of worker processes to build task tables')
+    parser.add_argument('sids', nargs='+')
+    opts = parser.parse_args()
+
+    for _sid in opts.sids:
+        _waterfall = get_waterfall(opts.input_dir, _sid,
+                                   n_workers=opts.workers)
+        print(_sid)
+        print(json.dumps(_nan_to_none(
+            {'phases'       : get_phase_stats(_waterfall),
+             'critical_path': get_critical_path(_waterfall)}), indent=4))
+
+# ------------------------------------------------------------------------------
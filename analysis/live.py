@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__email__     = 'info@radical-cybertools.org'
+__copyright__ = 'Copyright 2022, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Live (incremental) analysis of a running session: profiles of the agent
+components and of the tasks are tailed (per-file offsets are kept), and only
+newly appended lines are parsed to update the scheduling and launching rates,
+task placement times and concurrency of task execution phases.
+
+    python live.py <pilot_sandbox> [--interval 60]
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import time
+
+from prof_parser import parse_line
+
+AGENT_PROF_PATTERNS = ['agent_staging_input.*.prof',
+                       'agent_scheduling.*.prof',
+                       'agent_executing.*.prof']
+
+# tasks arrive at the scheduler (start of scheduling)
+SCHED_START_STATES = ['AGENT_SCHEDULING_PENDING', 'AGENT_SCHEDULING']
+
+# task events, which define execution phases:
+#     task_exec_start -> Setup -> app_start -> Running -> app_stop ->
+#     Termination -> task_exec_stop
+TASK_EVENTS = ['task_exec_start', 'app_start', 'app_stop', 'task_exec_stop']
+TASK_PHASES = {'task_exec_start': 'Setup',
+               'app_start'      : 'Running',
+               'app_stop'       : 'Termination',
+               'task_exec_stop' : None}
+
+
+class ProfTail:
+
+    def __init__(self, prof_path):
+
+        self.prof_path = prof_path
+        self.offset    = 0
+
+    def read(self):
+        # return events from newly appended complete lines
+        try:
+            if os.path.getsize(self.prof_path) <= self.offset:
+                return []
+        except OSError:
+            return []
+
+        with open(self.prof_path, 'rb') as fd:
+            fd.seek(self.offset)
+            data = fd.read()
+
+        # incomplete last line is read during the next call
+        n_bytes = data.rfind(b'\n') + 1
+        self.offset += n_bytes
+
+        events = []
+        for line in data[:n_bytes].decode('utf8').splitlines():
+            prof_event = parse_line(line)
+            if prof_event is not None:
+                events.append(prof_event)
+        return events
+
+
+class LiveSession:
+
+    def __init__(self, pilot_sandbox, agent_sandbox=None):
+
+        self.pilot_sandbox = pilot_sandbox
+        # agent profiles are in the pilot sandbox for a running pilot,
+        # and in `<sid>/pilot.0000` for a downloaded session
+        self.agent_sandbox = agent_sandbox or pilot_sandbox
+
+        self._agent_tails = {}
+        self._task_tails  = {}  # only for tasks that are not finished
+        self._task_events = {}
+
+        self.sched = {'count': 0, 'start': 0., 'end': 0.}
+        self.launch = {'count': 0, 'start': 0., 'end': 0.}
+        self.placement = {'count': 0, 'mean': 0., 'm2': 0.,
+                          'min': math.inf, 'max': -math.inf}
+        self.events = {e_name: 0 for e_name in TASK_EVENTS}
+        self.phases = {p_name: 0 for p_name in TASK_PHASES.values() if p_name}
+        self.concurrency = []  # (time, setup, running, termination)
+        self.last_time = 0.
+
+    @staticmethod
+    def _set_start(info, e_time):
+        # profiles are read one after another, thus the earliest time is kept
+        if not info['start'] or info['start'] > e_time:
+            info['start'] = e_time
+
+    def _update_agent(self, prof_event):
+
+        if prof_event.state in SCHED_START_STATES:
+            self._set_start(self.sched, prof_event.time)
+
+        elif prof_event.event == 'put' and \
+                prof_event.state == 'AGENT_EXECUTING_PENDING':
+            # task is passed by the scheduler to the executor
+            self.sched['count'] += 1
+            self.sched['end'] = max(self.sched['end'], prof_event.time)
+            self._set_start(self.launch, prof_event.time)
+
+        elif prof_event.event == 'exec_ok':
+            self.launch['count'] += 1
+            self.launch['end'] = max(self.launch['end'], prof_event.time)
+
+    def _update_placement(self, placement):
+        # running moments (Welford)
+        p = self.placement
+        p['count'] += 1
+        delta       = placement - p['mean']
+        p['mean']  += delta / p['count']
+        p['m2']    += delta * (placement - p['mean'])
+        p['min']    = min(p['min'], placement)
+        p['max']    = max(p['max'], placement)
+
+    def _update_task(self, uid, prof_event):
+
+        t_events = self._task_events.setdefault(uid, {})
+        if prof_event.event not in TASK_EVENTS or \
+                prof_event.event in t_events:
+            return
+
+        # current phase of the task is defined by its latest event
+        if t_events:
+            prev_phase = TASK_PHASES[max(t_events, key=t_events.get)]
+            if prev_phase:
+                self.phases[prev_phase] -= 1
+        t_events[prof_event.event] = prof_event.time
+        self.events[prof_event.event] += 1
+        phase = TASK_PHASES[max(t_events, key=t_events.get)]
+        if phase:
+            self.phases[phase] += 1
+
+        if prof_event.event == 'app_start' and 'task_exec_start' in t_events:
+            self._update_placement(
+                prof_event.time - t_events['task_exec_start'])
+
+    def update(self):
+        """
+        Parse newly appended lines of all profiles and update aggregates.
+        """
+        for pattern in AGENT_PROF_PATTERNS:
+            for prof_path in glob.glob('%s/%s' % (self.agent_sandbox,
+                                                  pattern)):
+                if prof_path not in self._agent_tails:
+                    self._agent_tails[prof_path] = ProfTail(prof_path)
+
+        for prof_tail in self._agent_tails.values():
+            for prof_event in prof_tail.read():
+                self._update_agent(prof_event)
+                self.last_time = max(self.last_time, prof_event.time)
+
+        for t_sandbox in glob.glob('%s/task.*' % self.pilot_sandbox):
+            uid = os.path.basename(t_sandbox)
+            if uid not in self._task_tails and uid not in self._task_events:
+                self._task_tails[uid] = ProfTail(
+                    '%s/%s.prof' % (t_sandbox, uid))
+
+        for uid in list(self._task_tails):
+            for prof_event in self._task_tails[uid].read():
+                self._update_task(uid, prof_event)
+                self.last_time = max(self.last_time, prof_event.time)
+            # finished tasks are not tracked anymore
+            if 'task_exec_stop' in self._task_events.get(uid, {}):
+                del self._task_tails[uid]
+
+        self.concurrency.append((self.last_time,
+                                 self.phases['Setup'],
+                                 self.phases['Running'],
+                                 self.phases['Termination']))
+
+    def get_summary(self):
+
+        def _rate(_info):
+            # rate is not defined till the start event is seen
+            if not _info['start']:
+                return None
+            duration = _info['end'] - _info['start']
+            if not _info['count'] or duration <= 0:
+                return 0.
+            return round(_info['count'] / duration, 2)
+
+        p = self.placement
+        if p['count']:
+            placement = (round(p['mean'], 2),
+                         round(math.sqrt(p['m2'] / p['count']), 2),
+                         round(p['min'], 2),
+                         round(p['max'], 2))
+        else:
+            placement = None
+
+        _, setup, running, termination = self.concurrency[-1] \
+            if self.concurrency else (0., 0, 0, 0)
+
+        return {
+            'time'            : self.last_time,
+            'scheduled'       : self.sched['count'],
+            'scheduling_rate' : _rate(self.sched),
+            'launched'        : self.launch['count'],
+            'launching_rate'  : _rate(self.launch),
+            'finished'        : self.events['task_exec_stop'],
+            'placement'       : placement,  # (mean, std, min, max)
+            'concurrency'     : {'Setup'      : setup,
+                                 'Running'    : running,
+                                 'Termination': termination},
+            'max_concurrency' : {
+                'Setup'      : max(c[1] for c in self.concurrency),
+                'Running'    : max(c[2] for c in self.concurrency),
+                'Termination': max(c[3] for c in self.concurrency)}
+            if self.concurrency else None
+        }
+
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('pilot_sandbox',
+                        help='Pilot sandbox (with task sandboxes)')
+    parser.add_argument('-a', '--agent_sandbox', default=None,
+                        help='Directory with agent profiles '
+                             '(default: pilot sandbox)')
+    parser.add_argument('-i', '--interval', type=float, default=60.,
+                        help='Time between updates (s)')
+    opts = parser.parse_args()
+
+    live_session = LiveSession(opts.pilot_sandbox, opts.agent_sandbox)
+    try:
+        while True:
+            live_session.update()
+            print(json.dumps(live_session.get_summary()), flush=True)
+            time.sleep(opts.interval)
+    except KeyboardInterrupt:
+        pass
+
+# ------------------------------------------------------------------------------
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__email__     = 'info@radical-cybertools.org'
+__copyright__ = 'Copyright 2022, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Straggler detection: per-task placement time, launch latency, exit status
+and skipped (not executed) tasks are aggregated per DVM and per node, and
+every group is compared with its peers with robust (median/MAD based)
+z-scores. Groups with scores above the threshold are reported, ranked by
+their scores.
+
+    python outliers.py -i ../data/workspace <sid> [<sid> ...]
+"""
+
+import argparse
+
+import numpy as np
+
+from latency    import get_waterfall
+from task_table import get_task_table, is_executed
+
+# metrics per group: median placement and launch latency, ratio of tasks
+# that failed (non-zero exit status) and that were skipped (not executed) out
+# of tasks scheduled to the group (higher values are worse)
+METRICS = ['placement', 'launching', 'failure_rate', 'skip_rate']
+
+THRESHOLD    = 3.5  # modified z-score (Iglewicz and Hoaglin)
+MIN_N_TASKS  = 5    # groups with fewer tasks are not scored
+MAD_SCALE    = 0.6745
+MEANAD_SCALE = 0.7979  # if MAD is 0, the mean absolute deviation is used
+
+
+def get_robust_scores(values):
+    """
+    Return modified z-scores (`0.6745 * (x - median) / MAD`), `NaN` values
+    are ignored and get score 0.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scores = np.zeros(values.size)
+    valid  = ~np.isnan(values)
+    if valid.sum() < 2:
+        return scores
+
+    median    = np.median(values[valid])
+    deviation = values[valid] - median
+    mad       = np.median(np.abs(deviation))
+    if mad:
+        scores[valid] = MAD_SCALE * deviation / mad
+    else:
+        mean_ad = np.mean(np.abs(deviation))
+        if mean_ad:
+            scores[valid] = MEANAD_SCALE * deviation / mean_ad
+    return scores
+
+
+def _get_group_metrics(group_ids, placement, launching, failed, skipped):
+    # per group: number of scheduled tasks and metrics (as `METRICS`)
+    output = {}
+    order  = np.argsort(group_ids, kind='stable')
+    ids, idx_start = np.unique(group_ids[order], return_index=True)
+    for g_id, idx in zip(ids, np.split(order, idx_start[1:])):
+        n_tasks     = int(idx.size)
+        g_placement = placement[idx][~np.isnan(placement[idx])]
+        g_launching = launching[idx][~np.isnan(launching[idx])]
+        output[g_id] = {
+            'tasks'       : n_tasks,
+            'placement'   : float(np.median(g_placement))
+                            if g_placement.size else np.nan,
+            'launching'   : float(np.median(g_launching))
+                            if g_launching.size else np.nan,
+            'failure_rate': float(failed[idx].sum() / n_tasks),
+            'skip_rate'   : float(skipped[idx].sum() / n_tasks)}
+    return output
+
+
+def get_group_metrics(input_dir, sid, n_workers=1):
+    """
+    Return `{'dvm': {dvm_id: metrics}, 'node': {node_name: metrics}}`;
+    tasks placed on several nodes are counted for every node. All tasks
+    scheduled to the group (with DVM id or nodes) are accounted.
+    """
+    table     = get_task_table(input_dir, sid, n_workers=n_workers)
+    waterfall = get_waterfall(input_dir, sid, table=table)
+
+    # status `-1` - exit status is not reported (e.g., task was skipped)
+    skipped   = ~is_executed(table)
+    failed    = table['status'] > 0
+    placement = waterfall['placement']
+    launching = waterfall['launching']
+
+    has_dvm = table['partition_id'] >= 0
+    output  = {'dvm': _get_group_metrics(
+        table['partition_id'][has_dvm], placement[has_dvm],
+        launching[has_dvm], failed[has_dvm], skipped[has_dvm])}
+
+    idx, nodes = [], []
+    for t_idx, t_nodes in enumerate(table['nodes']):
+        for node in set(t_nodes.split(',')) if t_nodes else []:
+            idx.append(t_idx)
+            nodes.append(node)
+    idx = np.array(idx, dtype=np.int64)
+    output['node'] = _get_group_metrics(
+        np.array(nodes, dtype=str), placement[idx], launching[idx],
+        failed[idx], skipped[idx])
+
+    return output
+
+
+def get_outliers(group_metrics, threshold=THRESHOLD, min_n_tasks=MIN_N_TASKS):
+    """
+    Return outliers ranked by their scores, `[(score, group_type, group_id,
+    metric, value, peers_median), ...]`.
+    """
+    output = []
+    for g_type, groups in group_metrics.items():
+        g_ids = [g_id for g_id, m in groups.items()
+                 if m['tasks'] >= min_n_tasks]
+        for metric in METRICS:
+            values = np.array([groups[g_id][metric] for g_id in g_ids],
+                              dtype=np.float64)
+            scores = get_robust_scores(values)
+            median = float(np.nanmedian(values)) \
+                if (~np.isnan(values)).any() else np.nan
+            for g_id, value, score in zip(g_ids, values, scores):
+                if score > threshold:
+                    output.append((round(float(score), 2), g_type,
+                                   g_id.item() if hasattr(g_id, 'item')
+                                   else g_id,
+                                   metric, float(value), median))
+    return sorted(output, key=lambda x: x[0], reverse=True)
+
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-i', '--input_dir', default='../data/workspace')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='Number of worker processes to build task tables')
+    parser.add_argument('-t', '--threshold', type=float, default=THRESHOLD)
+    parser.add_argument('-m', '--min_tasks', type=int, default=MIN_N_TASKS)
+    parser.add_argument('sids', nargs='+')
+    opts = parser.parse_args()
+
+    for _sid in opts.sids:
+        _outliers = get_outliers(get_group_metrics(opts.input_dir, _sid,
+                                                   n_workers=opts.workers),
+                                 threshold=opts.threshold,
+                                 min_n_tasks=opts.min_tasks)
+        print('%s - outliers: %s' % (_sid, len(_outliers)))
+        for _score, _g_type, _g_id, _metric, _value, _median in _outliers:
+            print('  %7.2f  %-4s %-10s %-12s %10.3f (peers median: %.3f)' % (
+                _score, _g_type, _g_id, _metric, _value, _median))
+
+# ------------------------------------------------------------------------------
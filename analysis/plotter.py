@@ -5,22 +5,49 @@ __email__     = 'info@radical-cybertools.org'
 __copyright__ = 'Copyright 2022, The RADICAL-Cybertools Team'
 __license__   = 'MIT'
 
-import glob
 import os
 
-import statistics as st
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools          import partial
 
 import matplotlib        as mpl
+import matplotlib.cbook  as cbook
 import matplotlib.pyplot as plt
 import matplotlib.ticker as mticker
+import numpy             as np
 
 import radical.analytics as ra
 import radical.pilot     as rp
 import radical.utils     as ru
 
+from concurrency   import get_phase_ranges, get_concurrency, \
+                          get_max_concurrency
+from profiling     import PROFILER
+from queue_depth   import get_queue_depths, QUEUE_LABELS
+from session_cache import load_session, invalidate
+from sketch        import Sketch
+from task_table    import get_task_table, get_app_start, is_executed
+
 COLUMN_WIDTH = 345  # 212
 PAGE_WIDTH   = 516
 
+# task placement times (task setup by PRRTE) ordered by task start time
+PLACEMENT_DTYPE = np.dtype([('start', np.float64), ('placement', np.float64)])
+
+CONCURRENCY_EVENTS = {
+    'Task scheduling': [{ru.STATE: 'AGENT_SCHEDULING'},
+                        {ru.EVENT: 'schedule_ok'}],
+    'Task execution' : [{ru.EVENT: 'exec_start'},
+                        {ru.EVENT: 'exec_stop'}]}
+
+PRRTE_CONCURRENCY_EVENTS = {
+    'Setup'      : [{ru.EVENT: 'task_exec_start'},
+                    {ru.EVENT: 'app_start'}],
+    'Running'    : [{ru.EVENT: 'app_start'},
+                    {ru.EVENT: 'app_stop'}],
+    'Termination': [{ru.EVENT: 'app_stop'},
+                    {ru.EVENT: 'exec_stop'}]}
+
 plt.style.use(ra.get_mplstyle('radical_mpl'))
 mpl.rcParams['text.usetex'] = False
 mpl.rcParams['font.serif']  = ['Nimbus Roman Becker No9L']
@@ -29,111 +56,172 @@ mpl.rcParams['font.family'] = 'serif'
 
 class Plotter:
 
-    def __init__(self, input_dir, plots_dir, sessions, save=False):
+    def __init__(self, input_dir, plots_dir, sessions, save=False,
+                 n_workers=None, cache_dir=None, profile=False,
+                 cprofile=False):
 
         self.input_dir = input_dir
         self.plots_dir = plots_dir
         self.sessions  = sessions
         self.save      = save
-        self.data      = {}
+        self.n_workers = n_workers  # to scan task sandboxes (None - all CPUs)
+        self.cache_dir = cache_dir  # for loaded sessions (None - default)
+        self.data      = {}  # {s_key: placements (PLACEMENT_DTYPE array)}
+
+        self._placements = {}
+        self._sketches   = {}  # {s_key: Sketch of placements}
+
+        if profile or cprofile:
+            # stage timings are collected by the global profiler
+            PROFILER.enable(cprofile=cprofile)
+
+    @staticmethod
+    def get_profile(f_path=None, stats_path=None):
+        # JSON summary of stages, and cProfile stats (if enabled)
+        if stats_path:
+            PROFILER.dump_stats(stats_path)
+        return PROFILER.to_json(f_path)
+
+    @PROFILER.profiled('load_sessions')
+    def load_sessions(self, s_keys=None, refresh=False):
+        s_keys = [k for k in (s_keys or list(self.sessions.keys()))
+                  if k in self.sessions]
+        n_sessions = len(s_keys)
+
+        if refresh:
+            # data derived from the previously loaded sessions is dropped
+            for k in s_keys:
+                for attr in ['ranges', 'queues']:
+                    self.sessions[k].pop(attr, None)
+
+        def _set_session(_idx, _k, _get_s_data):
+            try:
+                self.sessions[_k].update(_get_s_data())
+            except Exception as e:
+                # a corrupted session doesn't stop loading of the others
+                self.sessions[_k]['error'] = str(e)
+                print('[%s/%s] %s - failed to load: %s' % (
+                    _idx, n_sessions, _k, e))
+                return False
+            self.sessions[_k].pop('error', None)
+            print('[%s/%s] %s - loaded' % (_idx, n_sessions, _k))
+            return True
+
+        s_args = {k: (self.input_dir, self.sessions[k]['sid'],
+                      self.cache_dir, refresh) for k in s_keys}
+
+        loaded = []
+        if n_sessions == 1 or self.n_workers == 1:
+            for idx, k in enumerate(s_keys):
+                if _set_session(idx + 1, k, partial(load_session, *s_args[k])):
+                    loaded.append(k)
+            return loaded
+
+        # sessions are loaded in worker processes and returned to the Plotter
+        with ProcessPoolExecutor(max_workers=self.n_workers) as executor:
+            futures = {executor.submit(load_session, *s_args[k]): k
+                       for k in s_keys}
+            for idx, future in enumerate(as_completed(futures)):
+                if _set_session(idx + 1, futures[future], future.result):
+                    loaded.append(futures[future])
+        return loaded
+
+    def _load_missing_sessions(self, s_keys):
+        # returns False if any of sessions is unknown or failed to be loaded
+        s_to_be_loaded = []
+        for s_key in s_keys:
+            if s_key not in self.sessions:
+                return False
+            elif not self.sessions[s_key].get('session'):
+                s_to_be_loaded.append(s_key)
 
-    def load_sessions(self, s_keys=None):
+        if s_to_be_loaded:
+            self.load_sessions(s_keys=s_to_be_loaded)
+
+        return all(self.sessions[k].get('session') for k in s_keys)
+
+    def invalidate_sessions(self, s_keys=None):
         s_keys = s_keys or list(self.sessions.keys())
 
+        sids = []
         for k in s_keys:
 
             if k not in self.sessions:
                 continue
 
-            session = ra.Session(
-                '%s/%s' % (self.input_dir, self.sessions[k]['sid']),
-                'radical.pilot')
+            sids.append(self.sessions[k]['sid'])
+            for attr in ['session', 's_pilots', 's_tasks', 'pid', 'ranges',
+                         'queues']:
+                self.sessions[k].pop(attr, None)
 
-            self.sessions[k].update({
-                'session' : session,
-                's_pilots': session.filter(etype='pilot', inplace=False),
-                's_tasks' : session.filter(etype='task', inplace=False)})
-            self.sessions[k].update({
-                'pid'     : self.sessions[k]['s_pilots'].list('uid')[0]})
+        invalidate(self.input_dir, sids, cache_dir=self.cache_dir)
 
-    def set_prrte_placement_times(self, s_keys=None, with_comments=False):
+    @PROFILER.profiled('set_prrte_placement_times')
+    def set_prrte_placement_times(self, s_keys=None, with_comments=False,
+                                  refresh=False):
         s_keys = s_keys or list(self.sessions.keys())
-        self.data.clear()
-
-        def _zero_file(_path):
-            return not os.path.isfile(_path) or not os.path.getsize(_path)
+        # placements are kept per session, `data` holds the selected ones
+        self.data = {}
 
         comments = ''
         for k in s_keys:
 
             if k not in self.sessions:
                 continue
-            sid = self.sessions[k]['sid']
-
-            # set pilot sandbox name as "<sid>.pilot"
-            s_path = '%s/%s.pilot/task.*' % (self.input_dir, sid)
-            for t_sandbox in glob.glob(s_path):
-
-                if not os.path.isdir(t_sandbox):
-                    continue
 
-                f_path = '%s/%s' % (t_sandbox, os.path.basename(t_sandbox))
+            if refresh or k not in self._placements:
+                self._placements[k] = self._get_prrte_placement_times(k)
+                self._sketches.pop(k, None)
+            self.data[k] = self._placements[k]
 
-                # get only tasks that were executed
-                f_err_path, f_out_path = '%s.err' % f_path, '%s.out' % f_path
-                if _zero_file(f_err_path) or _zero_file(f_out_path):
-                    continue
+            if with_comments:
+                stats = self.get_placement_sketch(k).get_stats()
+                v = (round(stats['mean'], 2),
+                     round(stats['std'], 2),
+                     round(stats['min'], 2),
+                     round(stats['max'], 2))
+                comments += '%s - (mean, std, min, max): %s\n' % (k, str(v))
 
-                # check all tasks
+        if with_comments:
+            print(comments)
 
-                exec_start = exec_stop = app_start = 0.
-                with open('%s.prof' % f_path, encoding='utf8') as fd:
-                    for line in fd.readlines():
-                        if 'task_exec_start' in line:
-                            exec_start = float(line.split(',')[0])
-                        elif 'app_start' in line:
-                            app_start = float(line.split(',')[0])
-                        elif 'task_exec_stop' in line:
-                            exec_stop = float(line.split(',')[0])
+    def _get_prrte_placement_times(self, s_key):
 
-                if not exec_start:
-                    continue
+        table = get_task_table(self.input_dir, self.sessions[s_key]['sid'],
+                               n_workers=self.n_workers)
 
-                if not app_start:
-                    if not exec_stop:
-                        continue
-                    # adjust task placement duration (subtract sleep duration)
-                    with open('%s.sh' % f_path, encoding='utf8') as fd:
-                        for line in fd.readlines():
-                            if line.startswith('prun'):
-                                app_start = exec_stop - int(line.split('"')[3])
-                                break
+        # get only tasks that were executed and have startup time
+        app_start = get_app_start(table)
+        selected  = is_executed(table) & (table['exec_start'] != 0.) & \
+            ((app_start != 0.) | (table['exec_stop'] != 0.))
 
-                self.data.setdefault(k, []).append((exec_start,
-                                                    app_start - exec_start))
+        d = np.empty(int(selected.sum()), dtype=PLACEMENT_DTYPE)
+        d['start']     = table['exec_start'][selected]
+        d['placement'] = app_start[selected] - d['start']
+        d.sort(order=['start', 'placement'])
+        return d
 
-            self.data[k].sort()
-            if with_comments:
-                d = [x[1] for x in self.data[k]]
-                mu_placements = st.mean(d)
-                v = (round(mu_placements, 2),
-                     round(st.pstdev(d, mu_placements), 2),
-                     round(min(d), 2),
-                     round(max(d), 2))
-                comments += '%s - (mean, std, min, max): %s\n' % (k, str(v))
+    def get_placement_sketch(self, s_key):
+        # summary of placement times (moments and quantiles), mergeable
+        if s_key not in self._sketches:
+            self._sketches[s_key] = Sketch().update(
+                self._placements[s_key]['placement'])
+        return self._sketches[s_key]
 
-        if with_comments:
-            print(comments)
+    def get_placements(self, s_key, upper_threshold=None):
+        d = self.data[s_key]
+        if upper_threshold:
+            d = d[d['placement'] <= upper_threshold]
+        return d['placement']
 
+    @PROFILER.profiled('plot_prrte_placement_times')
     def plot_prrte_placement_times(self, upper_threshold=None):
         fig, ax = plt.subplots(figsize=ra.get_plotsize(COLUMN_WIDTH))
 
-        for k, d in self.data.items():
-            if upper_threshold:
-                d = [x for x in d if x[1] <= upper_threshold]
-            _x, _y = zip(*d)
-            ax.plot(list(range(1, len(_x) + 1)),
-                    _y,
+        for k in self.data:
+            placements = self.get_placements(k, upper_threshold)
+            ax.plot(np.arange(1, len(placements) + 1),
+                    placements,
                     label='%(d_nodes)s, %(d_dvms)s' % self.sessions[k])
 
         #ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left', borderaxespad=0.)
@@ -149,13 +237,14 @@ class Plotter:
             plot_name = 'prrte-placement-times.png'
             fig.savefig(os.path.join(self.plots_dir, plot_name))
 
+    @PROFILER.profiled('plot_prrte_placement_time_distr')
     def plot_prrte_placement_time_distr(self, x_label):
         fig, ax = plt.subplots(figsize=ra.get_plotsize(COLUMN_WIDTH))
 
         plot_data   = []
         plot_xticks = []
         for idx, (k, d) in enumerate(self.data.items()):
-            plot_data.append([x[1] for x in d])
+            plot_data.append(d['placement'])
             plot_xticks.append((idx + 1, self.sessions[k]['d_dvms']))
 
         ax.boxplot(plot_data, sym='')
@@ -169,27 +258,30 @@ class Plotter:
             plot_name = 'prrte-placement-time-distr.png'
             fig.savefig(os.path.join(self.plots_dir, plot_name))
 
+    @PROFILER.profiled('plot_prrte_placement_time_distr_combined')
     def plot_prrte_placement_time_distr_combined(self, x_label):
         fig, ax = plt.subplots(figsize=ra.get_plotsize(COLUMN_WIDTH))
 
         data_combined = {}
 
-        for k, d in self.data.items():
+        # runs of the same configuration (`_r1`, `_r2`, ...) are combined
+        for k in self.data:
             new_k = k.split('_r')[0]
             if new_k not in data_combined:
-                data_combined[new_k] = {'data' : [],
-                                        'xtick': '%s, %s' %
-                                                 (self.sessions[k]['d_nodes'],
-                                                  self.sessions[k]['d_dvms'])}
-            data_combined[new_k]['data'].extend([x[1] for x in d])
+                data_combined[new_k] = {'s_keys': [],
+                                        'xtick' : '%s, %s' %
+                                                  (self.sessions[k]['d_nodes'],
+                                                   self.sessions[k]['d_dvms'])}
+            data_combined[new_k]['s_keys'].append(k)
 
         plot_data   = []
         plot_xticks = []
         for idx, d in enumerate(data_combined.values()):
-            plot_data.append(d['data'])
+            plot_data.append(cbook.boxplot_stats(np.concatenate(
+                [self.data[k]['placement'] for k in d['s_keys']]))[0])
             plot_xticks.append((idx + 1, d['xtick']))
 
-        ax.boxplot(plot_data, sym='')
+        ax.bxp(plot_data, showfliers=False)
         ax.set_ylabel('Time for task setup by PRRTE (s)')
         ax.set_xlabel(x_label)
 
@@ -200,22 +292,43 @@ class Plotter:
             plot_name = 'prrte-placement-time-distr-combined.png'
             fig.savefig(os.path.join(self.plots_dir, plot_name))
 
-    def plot_concurrency(self, s_keys, x_limits=None, y_limits=None):
+    @PROFILER.profiled('get_concurrency')
+    def get_concurrency(self, s_key, events, sampling=1):
+        # start/stop timestamps of phases are extracted once per session
+        ranges  = self.sessions[s_key].setdefault('ranges', {})
+        missing = {e_name: events[e_name] for e_name in events
+                   if e_name not in ranges}
+        if missing:
+            ranges.update(get_phase_ranges(
+                self.sessions[s_key]['s_tasks'].get(), missing))
+
+        return {e_name: get_concurrency(*ranges[e_name], sampling=sampling)
+                for e_name in events}
+
+    @PROFILER.profiled('get_queue_depths')
+    def get_queue_depths(self, s_key):
+        # queue depths are derived once per session
+        if 'queues' not in self.sessions[s_key]:
+            self.sessions[s_key]['queues'] = get_queue_depths(
+                self.input_dir, self.sessions[s_key]['sid'],
+                n_workers=self.n_workers)
+        return self.sessions[s_key]['queues']
+
+    def get_prrte_concurrency_max(self, s_keys):
+
+        if not self._load_missing_sessions(s_keys):
+            return
 
-        s_to_be_loaded = []
-        for s_key in s_keys:
-            if s_key not in self.sessions:
-                return
-            elif not self.sessions[s_key].get('session'):
-                s_to_be_loaded.append(s_key)
+        return {k: get_max_concurrency(
+                    self.get_concurrency(k, PRRTE_CONCURRENCY_EVENTS))
+                for k in s_keys}
 
-        if s_to_be_loaded:
-            self.load_sessions(s_keys=s_to_be_loaded)
+    @PROFILER.profiled('plot_concurrency')
+    def plot_concurrency(self, s_keys, x_limits=None, y_limits=None,
+                         queues=False):
 
-        events = {'Task scheduling': [{ru.STATE: 'AGENT_SCHEDULING'},
-                                      {ru.EVENT: 'schedule_ok'}],
-                  'Task execution' : [{ru.EVENT: 'exec_start'},
-                                      {ru.EVENT: 'exec_stop'}]}
+        if not self._load_missing_sessions(s_keys):
+            return
 
         n_subplots = len(s_keys)
         fig, axarr = plt.subplots(1, n_subplots, figsize=(
@@ -235,15 +348,22 @@ class Plotter:
             p_starttime = self.sessions[k]['s_pilots'].\
                 timestamps(event={ru.EVENT: 'bootstrap_0_start'})[0]
 
-            time_series = {e_name: self.sessions[k]['session'].
-                           concurrency(event=events[e_name], sampling=1)
-                           for e_name in events}
+            time_series = self.get_concurrency(k, CONCURRENCY_EVENTS)
 
-            for e_name in time_series:
-                ax.plot([e[0] - p_starttime for e in time_series[e_name]],
-                        [e[1] for e in time_series[e_name]],
+            for e_name, (times, n_tasks) in time_series.items():
+                ax.plot(times - p_starttime,
+                        n_tasks,
                         label=ra.to_latex(e_name))
 
+            if queues:
+                for q_name, (times, depths) in \
+                        self.get_queue_depths(k).items():
+                    ax.step(times - p_starttime,
+                            depths,
+                            where='post',
+                            linestyle='--',
+                            label=ra.to_latex(QUEUE_LABELS[q_name]))
+
             if x_limits and isinstance(x_limits, (list, tuple)):
                 ax.set_xlim(x_limits)
 
@@ -252,10 +372,13 @@ class Plotter:
 
             sub_label = chr(ord(sub_label) + 1)
 
-        fig.legend(['Task scheduling', 'Task execution'],
+        legend = ['Task scheduling', 'Task execution']
+        if queues:
+            legend.extend(QUEUE_LABELS.values())
+        fig.legend(legend,
                    loc='upper center',
                    bbox_to_anchor=(0.5, 1.02),
-                   ncol=2)
+                   ncol=len(legend) if len(legend) < 4 else 3)
         fig.text(0.0, 0.5, 'Number of tasks', va='center', rotation='vertical')
         fig.text(0.5, 0.05, 'Time (s)', ha='center')
 
@@ -265,24 +388,11 @@ class Plotter:
             plot_name = 'concurrency_%s.png' % '_'.join(s_keys)
             fig.savefig(os.path.join(self.plots_dir, plot_name))
 
+    @PROFILER.profiled('plot_prrte_concurrency')
     def plot_prrte_concurrency(self, s_keys, x_limits=None, y_limits=None):
 
-        s_to_be_loaded = []
-        for s_key in s_keys:
-            if s_key not in self.sessions:
-                return
-            elif not self.sessions[s_key].get('session'):
-                s_to_be_loaded.append(s_key)
-
-        if s_to_be_loaded:
-            self.load_sessions(s_keys=s_to_be_loaded)
-
-        events = {'Setup'      : [{ru.EVENT: 'task_exec_start'},
-                                  {ru.EVENT: 'app_start'}],
-                  'Running'    : [{ru.EVENT: 'app_start'},
-                                  {ru.EVENT: 'app_stop'}],
-                  'Termination': [{ru.EVENT: 'app_stop'},
-                                  {ru.EVENT: 'exec_stop'}]}
+        if not self._load_missing_sessions(s_keys):
+            return
 
         n_subplots = len(s_keys)
         fig, axarr = plt.subplots(1, n_subplots, figsize=(
@@ -303,15 +413,14 @@ class Plotter:
             p_starttime = self.sessions[k]['s_pilots'].\
                 timestamps(event={ru.EVENT: 'bootstrap_0_start'})[0]
 
-            time_series = {e_name: self.sessions[k]['session'].
-                           concurrency(event=events[e_name], sampling=1)
-                           for e_name in events}
+            time_series = self.get_concurrency(k, PRRTE_CONCURRENCY_EVENTS)
 
             print(k)
-            for e_name in time_series:
-                n_tasks = [e[1] for e in time_series[e_name]]
-                print('   %s - max:%s' % (e_name, max(n_tasks)))
-                ax.plot([e[0] - p_starttime for e in time_series[e_name]],
+            for e_name, n_max in get_max_concurrency(time_series).items():
+                print('   %s - max:%s' % (e_name, n_max))
+
+            for e_name, (times, n_tasks) in time_series.items():
+                ax.plot(times - p_starttime,
                         n_tasks,
                         label=ra.to_latex(e_name))
 
@@ -338,12 +447,11 @@ class Plotter:
             plot_name = 'concurrency_exec_%s.png' % '_'.join(s_keys)
             fig.savefig(os.path.join(self.plots_dir, plot_name))
 
+    @PROFILER.profiled('plot_utilization')
     def plot_utilization(self, s_key, x_limits=None):
 
-        if s_key not in self.sessions:
+        if not self._load_missing_sessions([s_key]):
             return
-        elif not self.sessions[s_key].get('session'):
-            self.load_sessions(s_keys=[s_key])
 
         sid = self.sessions[s_key]['sid']
         pid = self.sessions[s_key]['pid']
@@ -370,16 +478,18 @@ class Plotter:
         legend = None
         for idx, rtype in enumerate(['cpu', 'gpu']):
 
-            provided, consumed, stats_abs, stats_rel, info = exp.utilization(
-                metrics=metrics, rtype=rtype)
+            with PROFILER.stage('exp.utilization'):
+                provided, consumed, stats_abs, stats_rel, info = \
+                    exp.utilization(metrics=metrics, rtype=rtype)
 
             # generate the subplot with labels
             legend, patches, x, y = ra.get_plot_utilization(
                 metrics, consumed, p_zeros[sid][pid], sid)
 
             # place all the patches, one for each metric, on the axes
-            for patch in patches:
-                axarr[idx].add_patch(patch)
+            with PROFILER.stage('patches'):
+                for patch in patches:
+                    axarr[idx].add_patch(patch)
 
             if x_limits and isinstance(x_limits, (list, tuple)):
                 axarr[idx].set_xlim(x_limits)
@@ -417,15 +527,8 @@ class Plotter:
     def print_utilization_metrics(self, s_keys=None):
         s_keys = s_keys or list(self.sessions.keys())
 
-        s_to_be_loaded = []
-        for s_key in s_keys:
-            if s_key not in self.sessions:
-                return
-            elif not self.sessions[s_key].get('session'):
-                s_to_be_loaded.append(s_key)
-
-        if s_to_be_loaded:
-            self.load_sessions(s_keys=s_to_be_loaded)
+        if not self._load_missing_sessions(s_keys):
+            return
 
         metrics = [
             ['Bootstrap', ['boot', 'setup_1'], '#c6dbef'],
@@ -445,12 +548,11 @@ class Plotter:
                 _, _, stats_abs, stats_rel, info = s.utilization(metrics, rtype)
                 print('  %s RU: ' % rtype.upper(), stats_abs, stats_rel, info)
 
+    @PROFILER.profiled('plot_utilization_exec')
     def plot_utilization_exec(self, s_key, x_limits=None):
 
-        if s_key not in self.sessions:
+        if not self._load_missing_sessions([s_key]):
             return
-        elif not self.sessions[s_key].get('session'):
-            self.load_sessions(s_keys=[s_key])
 
         sid = self.sessions[s_key]['sid']
         pid = self.sessions[s_key]['pid']
@@ -473,22 +575,24 @@ class Plotter:
         legend = None
         for idx, rtype in enumerate(['cpu', 'gpu']):
 
-            consumed = rp.utils.get_consumed_resources(
-                exp._sessions[0],
-                rtype,
-                {'consume': {
-                    'exec_setup'  : [{ru.EVENT: 'task_exec_start'  },
-                                     {ru.EVENT: 'app_start'        }],
-                    'exec_run'    : [{ru.EVENT: 'app_start'        },
-                                     {ru.EVENT: 'app_stop'         }]}})
+            with PROFILER.stage('exp.utilization'):
+                consumed = rp.utils.get_consumed_resources(
+                    exp._sessions[0],
+                    rtype,
+                    {'consume': {
+                        'exec_setup'  : [{ru.EVENT: 'task_exec_start'  },
+                                         {ru.EVENT: 'app_start'        }],
+                        'exec_run'    : [{ru.EVENT: 'app_start'        },
+                                         {ru.EVENT: 'app_stop'         }]}})
 
             # generate the subplot with labels
             legend, patches, x, y = ra.get_plot_utilization(
                 metrics, {sid: consumed}, p_zeros[sid][pid], sid)
 
             # place all the patches, one for each metric, on the axes
-            for patch in patches:
-                axarr[idx].add_patch(patch)
+            with PROFILER.stage('patches'):
+                for patch in patches:
+                    axarr[idx].add_patch(patch)
 
             if x_limits and isinstance(x_limits, (list, tuple)):
                 axarr[idx].set_xlim(x_limits)
@@ -523,6 +627,7 @@ class Plotter:
             plot_name = 'utilization_exec_%s.png' % s_key
             fig.savefig(os.path.join(self.plots_dir, plot_name))
 
+    @PROFILER.profiled('plot_utilization_stack')
     def plot_utilization_stack(self, s_keys):
 
         from radical.analytics.utils import to_latex
@@ -557,15 +662,8 @@ class Plotter:
         to_stack = [m[0] for m in metrics]
         to_plot = {m[0]: m[1] for m in metrics}
 
-        s_to_be_loaded = []
-        for s_key in s_keys:
-            if s_key not in self.sessions:
-                return
-            elif not self.sessions[s_key].get('session'):
-                s_to_be_loaded.append(s_key)
-
-        if s_to_be_loaded:
-            self.load_sessions(s_keys=s_to_be_loaded)
+        if not self._load_missing_sessions(s_keys):
+            return
 
         n_subplots = len(s_keys)
         fig, axarr = plt.subplots(2, n_subplots, figsize=(
@@ -593,8 +691,10 @@ class Plotter:
             n_nodes = int(p_size / rm_info['cores_per_node'])
             n_tasks = len(self.sessions[k]['s_tasks'].get())
 
-            p_resrc, series, x = ra.get_pilot_series(
-                self.sessions[k]['session'], p, tmap, ['cpu', 'gpu'], True)
+            with PROFILER.stage('exp.utilization'):
+                p_resrc, series, x = ra.get_pilot_series(
+                    self.sessions[k]['session'], p, tmap, ['cpu', 'gpu'],
+                    True)
 
         # # sub-plots for each resource type, legend on first, x-axis shared
         # fig = plt.figure(figsize=(ra.get_plotsize(512)))
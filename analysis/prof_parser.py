@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__email__     = 'info@radical-cybertools.org'
+__copyright__ = 'Copyright 2022, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Single-pass parser for RP profiles (`*.prof`), where each line has the
+following fields: `time,event,comp,thread,uid,state,msg`. Profiles of several
+sub-agents of the same component are read as one time-ordered stream.
+"""
+
+import glob
+import heapq
+import mmap
+import os
+import sys
+
+from collections import namedtuple
+
+import numpy as np
+
+from profiling import PROFILER
+
+PROF_FIELDS = ['time', 'event', 'comp', 'thread', 'uid', 'state', 'msg']
+
+# profiles larger than that are streamed through `mmap`
+MMAP_MIN_SIZE = 1024 * 1024
+
+ProfEvent = namedtuple('ProfEvent', PROF_FIELDS)
+
+_intern = sys.intern
+
+
+def parse_line(line):
+    """
+    Return a profile event (`ProfEvent`) or `None` for comments, empty and
+    malformed lines.
+    """
+    if not line or line[0] == '#':
+        return None
+
+    fields = line.rstrip('\n').split(',', 6)
+    if len(fields) < 7:
+        return None
+
+    try:
+        t = float(fields[0])
+    except ValueError:
+        return None
+
+    # event names, components and states are repeated in every profile
+    return ProfEvent(t,
+                     _intern(fields[1]),
+                     _intern(fields[2]),
+                     _intern(fields[3]),
+                     fields[4],
+                     _intern(fields[5]),
+                     fields[6])
+
+
+def _read_lines(prof_path, use_mmap=None):
+
+    f_size = os.path.getsize(prof_path)
+    PROFILER.count_read(f_size)
+
+    if use_mmap is None:
+        use_mmap = f_size >= MMAP_MIN_SIZE
+
+    if not use_mmap:
+        with open(prof_path, encoding='utf8') as fd:
+            yield from fd
+        return
+
+    with open(prof_path, 'rb') as fd:
+        if not os.fstat(fd.fileno()).st_size:
+            return
+        with mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for line in iter(mm.readline, b''):
+                yield line.decode('utf8')
+
+
+def read_prof(prof_path, events=None, use_mmap=None):
+    """
+    Yield profile events, optionally only the ones with names from `events`.
+    """
+    for line in _read_lines(prof_path, use_mmap=use_mmap):
+        prof_event = parse_line(line)
+        if prof_event is None:
+            continue
+        if events is not None and prof_event.event not in events:
+            continue
+        yield prof_event
+
+
+def get_agent_profs(agent_sandbox, component):
+    """
+    Return profiles of all sub-agents of the agent component (e.g.,
+    `agent_scheduling`, `agent_executing`) from the agent sandbox.
+    """
+    return sorted(glob.glob('%s/%s.*.prof' % (agent_sandbox, component)))
+
+
+def merge_profs(prof_paths, events=None, use_mmap=None):
+    """
+    Yield `(source, ProfEvent)` from several profiles ordered by time (k-way
+    merge of sorted profiles), where `source` is the profile name without
+    extension (e.g., `agent_executing.0001`).
+    """
+    def _tagged(_prof_path):
+        # profile lines are not guaranteed to be time-ordered (e.g., written
+        # by several threads), thus (selected) events are sorted per profile,
+        # events with the same time keep their order
+        source = os.path.basename(_prof_path).rsplit('.', 1)[0]
+        for prof_event in sorted(read_prof(_prof_path, events=events,
+                                           use_mmap=use_mmap),
+                                 key=lambda e: e.time):
+            yield source, prof_event
+
+    return heapq.merge(*[_tagged(p) for p in prof_paths],
+                       key=lambda x: x[1].time)
+
+
+def get_event_times(prof_path, events):
+    """
+    Return the timestamp of the (last) occurrence of every event from
+    `events` found in the profile, `{event_name: time}`.
+    """
+    return {e.event: e.time for e in read_prof(prof_path, events=events)}
+
+
+def get_prof_arrays(prof_path, events=None, use_mmap=None):
+    """
+    Return profile events as a dict of NumPy arrays (one array per field).
+    """
+    columns = list(zip(*read_prof(prof_path, events=events,
+                                  use_mmap=use_mmap)))
+    if not columns:
+        columns = [[] for _ in PROF_FIELDS]
+    arrays = {'time': np.array(columns[0], dtype=np.float64)}
+    for name, column in zip(PROF_FIELDS[1:], columns[1:]):
+        arrays[name] = np.array(column, dtype=str)
+    return arrays
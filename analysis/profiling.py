@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__email__     = 'info@radical-cybertools.org'
+__copyright__ = 'Copyright 2022, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Optional instrumentation of the analysis pipeline: wall time, number of files
+and bytes read, and peak RSS are collected per stage; the summary is emitted
+as JSON, and (if requested) cProfile stats are dumped for `pstats`.
+
+    from profiling import PROFILER
+    PROFILER.enable(cprofile=True)
+    with PROFILER.stage('load_sessions'):
+        ...
+    PROFILER.to_json('profile.json')
+    PROFILER.dump_stats('profile.pstats')
+"""
+
+import cProfile
+import functools
+import json
+import resource
+import time
+
+from contextlib import contextmanager
+
+
+class Profiler:
+
+    def __init__(self):
+
+        self.enabled = False
+        self.files   = 0  # counters are updated by the parsing layer
+        self.bytes   = 0
+
+        self._stages   = {}
+        self._cprofile = None
+
+    def enable(self, cprofile=False):
+        self.enabled = True
+        if cprofile and not self._cprofile:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def disable(self):
+        self.enabled = False
+        if self._cprofile:
+            self._cprofile.disable()
+
+    def reset(self):
+        self.files = self.bytes = 0
+        self._stages.clear()
+
+    def count_read(self, n_bytes, n_files=1):
+        if self.enabled:
+            self.files += n_files
+            self.bytes += n_bytes
+
+    @staticmethod
+    def get_peak_rss():
+        # peak RSS (MB) of this process and of its (finished) workers
+        return round(max(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) / 1024., 2)
+
+    @contextmanager
+    def stage(self, name):
+
+        if not self.enabled:
+            yield
+            return
+
+        files, n_bytes = self.files, self.bytes
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            info = self._stages.setdefault(name, {'calls'   : 0,
+                                                  'time'    : 0.,
+                                                  'files'   : 0,
+                                                  'bytes'   : 0,
+                                                  'peak_rss': 0.})
+            info['calls'] += 1
+            info['time']  += time.perf_counter() - start_time
+            info['files'] += self.files - files
+            info['bytes'] += self.bytes - n_bytes
+            info['peak_rss'] = max(info['peak_rss'], self.get_peak_rss())
+
+    def profiled(self, name):
+        # decorator for functions that represent stages
+        def _decorator(func):
+            @functools.wraps(func)
+            def _wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return func(*args, **kwargs)
+            return _wrapper
+        return _decorator
+
+    def get_summary(self):
+        # time (s), bytes (B), peak_rss (MB); nested stages are included into
+        # their outer stages
+        return {name: dict(info, time=round(info['time'], 4))
+                for name, info in self._stages.items()}
+
+    def to_json(self, f_path=None):
+        output = json.dumps(self.get_summary(), indent=4)
+        if f_path:
+            with open(f_path, 'w', encoding='utf8') as fd:
+                fd.write(output)
+        return output
+
+    def dump_stats(self, f_path):
+        if not self._cprofile:
+            raise RuntimeError('cProfile is not enabled')
+        self._cprofile.disable()
+        self._cprofile.dump_stats(f_path)
+        if self.enabled:
+            self._cprofile.enable()
+
+
+PROFILER = Profiler()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__email__     = 'info@radical-cybertools.org'
+__copyright__ = 'Copyright 2022, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Queue depth engine: within one streaming pass over (merged) staging input,
+scheduler and executor profiles, tasks entering and leaving every queue are
+tracked, and the number of tasks in the queue is derived as a step function
+over time:
+
+    scheduler - backlog in front of the scheduler
+                (any event with AGENT_SCHEDULING_PENDING -> schedule_ok)
+    executor  - backlog between the scheduler and executors
+                (put AGENT_EXECUTING_PENDING -> AGENT_EXECUTING)
+    prrte     - tasks launched by executors and waiting on PRRTE
+                (exec_ok -> app_start, from the task table)
+
+    python queue_depth.py -i ../data/workspace <sid> [<sid> ...]
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+from prof_parser import get_agent_profs, merge_profs
+from task_table  import get_task_table, get_app_start
+
+# queue name: (enter event filter, leave event filter), the state is set by
+# the component that passes the task to the scheduler, thus any event name
+QUEUES = {
+    'scheduler': ({'state': 'AGENT_SCHEDULING_PENDING'},
+                  {'event': 'schedule_ok'}),
+    'executor' : ({'event': 'put', 'state': 'AGENT_EXECUTING_PENDING'},
+                  {'event': 'advance', 'state': 'AGENT_EXECUTING'}),
+    'prrte'    : ({'event': 'exec_ok'},
+                  None)}  # tasks leave the queue with `app_start`
+
+# agent components, which profiles are scanned
+PROF_COMPONENTS = ['agent_staging_input', 'agent_scheduling',
+                   'agent_executing']
+
+QUEUE_LABELS = {'scheduler': 'Scheduler backlog',
+                'executor' : 'Executor backlog',
+                'prrte'    : 'Waiting on PRRTE'}
+
+
+def _match(e, e_filter):
+    return e_filter.get('event') in [None, e.event] and \
+        e_filter.get('state') in [None, e.state]
+
+
+def get_queue_events(pilot_sandbox, app_starts=None):
+    """
+    Return `{queue_name: (times, deltas)}`, where `deltas` is `+1` for a
+    task entering the queue, and `-1` for a task leaving it (tasks that
+    leave the queue without entering it are ignored). `app_starts` is
+    `{uid: time}` for the `prrte` queue.
+    """
+    prof_paths = []
+    for component in PROF_COMPONENTS:
+        prof_paths.extend(get_agent_profs(pilot_sandbox, component))
+    filters = [f for q_filters in QUEUES.values() for f in q_filters if f]
+    events  = None if any('event' not in f for f in filters) else \
+        set(f['event'] for f in filters)
+
+    queued = {q_name: set() for q_name in QUEUES}
+    deltas = {q_name: ([], []) for q_name in QUEUES}
+    for _, e in merge_profs(prof_paths, events=events):
+        if not e.uid.startswith('task.'):
+            continue
+        for q_name, (enter_filter, leave_filter) in QUEUES.items():
+            if _match(e, enter_filter):
+                if e.uid in queued[q_name]:
+                    continue
+                queued[q_name].add(e.uid)
+                delta = 1
+            elif leave_filter and _match(e, leave_filter) and \
+                    e.uid in queued[q_name]:
+                queued[q_name].remove(e.uid)
+                delta = -1
+            else:
+                continue
+            deltas[q_name][0].append(e.time)
+            deltas[q_name][1].append(delta)
+
+    # `app_start` is recorded in task profiles (collected by the task table)
+    for uid in queued['prrte']:
+        if (app_starts or {}).get(uid):
+            deltas['prrte'][0].append(app_starts[uid])
+            deltas['prrte'][1].append(-1)
+
+    return {q_name: (np.array(times, dtype=np.float64),
+                     np.array(q_deltas, dtype=np.int64))
+            for q_name, (times, q_deltas) in deltas.items()}
+
+
+def get_queue_depth(times, deltas):
+    """
+    Return `(times, depths)` - the step function (the depth holds from the
+    time point till the next one), events with the same timestamp are
+    combined.
+    """
+    if not times.size:
+        return np.array([], dtype=np.float64), np.array([], dtype=np.int64)
+    points, idx = np.unique(times, return_inverse=True)
+    return points, np.cumsum(np.bincount(idx, weights=deltas)).astype(np.int64)
+
+
+def get_queue_depths(input_dir, sid, n_workers=1):
+    """
+    Return `{queue_name: (times, depths)}` for queues of the session.
+    """
+    table      = get_task_table(input_dir, sid, n_workers=n_workers)
+    app_start  = get_app_start(table)
+    app_starts = dict(zip(table['uid'][app_start != 0.].tolist(),
+                          app_start[app_start != 0.].tolist()))
+
+    pilot_sandbox = os.path.join(input_dir, sid, 'pilot.0000')
+    return {q_name: get_queue_depth(*q_events) for q_name, q_events in
+            get_queue_events(pilot_sandbox, app_starts).items()}
+
+
+def get_queue_stats(times, depths):
+    """
+    Return max and time-weighted mean depth, and time with a non-empty queue.
+    """
+    if times.size < 2:
+        return {'max'      : int(depths.max()) if depths.size else 0,
+                'mean'     : 0.,
+                'busy_time': 0.}
+    durations = np.diff(times)
+    t_total   = float(times[-1] - times[0])
+    return {'max'      : int(depths.max()),
+            'mean'     : round(float((depths[:-1] * durations).sum()) /
+                               t_total, 2) if t_total else 0.,
+            'busy_time': round(float(durations[depths[:-1] > 0].sum()), 2)}
+
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-i', '--input_dir', default='../data/workspace')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='Number of worker processes to build task tables')
+    parser.add_argument('sids', nargs='+')
+    opts = parser.parse_args()
+
+    for _sid in opts.sids:
+        _depths = get_queue_depths(opts.input_dir, _sid,
+                                   n_workers=opts.workers)
+        print(_sid)
+        print(json.dumps({_q: get_queue_stats(*_d)
+                          for _q, _d in _depths.items()}, indent=4))
+
+# ------------------------------------------------------------------------------
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__email__     = 'info@radical-cybertools.org'
+__copyright__ = 'Copyright 2022, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Headless batch rendering of `Plotter` figures (Agg backend) in parallel
+worker processes.
+
+    python render.py --sessions sessions.json --figures figures.json
+
+Figure spec is a dict with the name of the `Plotter` method, its arguments,
+and (for placement time figures) sessions, which placement times should be
+set before plotting:
+
+    {"method"    : "plot_prrte_placement_times",
+     "placements": ["n512_dvm2_r2", "n1024_dvm8_r3"],
+     "kwargs"    : {"upper_threshold": 1000}}
+
+Data of sessions shared by several figures is prepared only once: task tables
+and loaded sessions are cached on disk before rendering starts, and figures
+with the same set of sessions are rendered by the same worker.
+"""
+
+import argparse
+import json
+import os
+import warnings
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib as mpl
+mpl.use('Agg')
+
+from session_cache import load_session  # noqa: E402
+from task_table    import get_task_table  # noqa: E402
+
+# methods that require loaded RA sessions (others use task tables only)
+SESSION_METHODS = ['plot_concurrency',
+                   'plot_prrte_concurrency',
+                   'plot_utilization',
+                   'plot_utilization_exec',
+                   'plot_utilization_stack']
+
+
+def get_spec_sessions(spec):
+    kwargs = spec.get('kwargs', {})
+    s_keys = list(kwargs.get('s_keys') or [])
+    if kwargs.get('s_key'):
+        s_keys.append(kwargs['s_key'])
+    return s_keys + list(spec.get('placements') or [])
+
+
+def prepare_session(input_dir, sid, cache_dir=None, with_session=True):
+    get_task_table(input_dir, sid, n_workers=1)
+    if with_session:
+        load_session(input_dir, sid, cache_dir=cache_dir)
+
+
+def render_figures(input_dir, plots_dir, sessions, specs, cache_dir=None):
+    # Plotter (with pyplot) is imported within the worker process only
+    import matplotlib.pyplot as plt
+    from plotter import Plotter
+
+    warnings.filterwarnings('ignore', message='.*non-interactive.*')
+
+    p = Plotter(input_dir=input_dir, plots_dir=plots_dir, sessions=sessions,
+                save=True, n_workers=1, cache_dir=cache_dir)
+
+    errors = []
+    for spec in specs:
+        try:
+            if spec.get('placements'):
+                p.set_prrte_placement_times(s_keys=spec['placements'])
+            getattr(p, spec['method'])(**spec.get('kwargs', {}))
+        except Exception as e:
+            errors.append((spec['method'], str(e)))
+        finally:
+            plt.close('all')
+    return errors
+
+
+def render(input_dir, plots_dir, sessions, specs, n_workers=None,
+           cache_dir=None):
+
+    # prepare data of every session once
+    s_info = {}
+    for spec in specs:
+        for k in get_spec_sessions(spec):
+            if k not in sessions:
+                raise ValueError('unknown session key: %s' % k)
+            s_info.setdefault(k, False)
+            if spec['method'] in SESSION_METHODS:
+                s_info[k] = True
+
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+
+        futures = {executor.submit(prepare_session, input_dir,
+                                   sessions[k]['sid'], cache_dir,
+                                   with_session): k
+                   for k, with_session in s_info.items()}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                print('%s - failed to prepare: %s' % (futures[future], e))
+
+        # figures with the same set of sessions are rendered together
+        groups = {}
+        for spec in specs:
+            groups.setdefault(tuple(sorted(set(get_spec_sessions(spec)))),
+                              []).append(spec)
+
+        futures = {executor.submit(render_figures, input_dir, plots_dir,
+                                   {k: dict(sessions[k]) for k in g_keys},
+                                   g_specs, cache_dir): g_keys
+                   for g_keys, g_specs in groups.items()}
+        n_errors = 0
+        for future in as_completed(futures):
+            for method, error in future.result():
+                n_errors += 1
+                print('%s (%s) - failed: %s' % (
+                    method, ', '.join(futures[future]), error))
+
+    print('figures rendered: %s/%s' % (len(specs) - n_errors, len(specs)))
+
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-s', '--sessions', default='sessions.json',
+                        help='Sessions registry (JSON)')
+    parser.add_argument('-f', '--figures', default='figures.json',
+                        help='List of figure specs (JSON)')
+    parser.add_argument('-i', '--input_dir', default='../data/workspace')
+    parser.add_argument('-o', '--plots_dir', default='../plots')
+    parser.add_argument('-c', '--cache_dir', default=None)
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='Number of worker processes (default: all CPUs)')
+    opts = parser.parse_args()
+
+    with open(opts.sessions, encoding='utf8') as fd:
+        _sessions = json.load(fd)
+    with open(opts.figures, encoding='utf8') as fd:
+        _specs = json.load(fd)
+
+    os.makedirs(opts.plots_dir, exist_ok=True)
+    render(opts.input_dir, opts.plots_dir, _sessions, _specs,
+           n_workers=opts.workers, cache_dir=opts.cache_dir)
+
+# ------------------------------------------------------------------------------
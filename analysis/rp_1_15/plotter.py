@@ -7,6 +7,7 @@ __license__   = 'MIT'
 
 import glob
 import os
+import sys
 
 import statistics as st
 
@@ -18,6 +19,10 @@ import radical.analytics as ra
 import radical.pilot     as rp
 import radical.utils     as ru
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..'))
+from prof_parser import get_event_times  # noqa: E402
+
 COLUMN_WIDTH = 345  # 212
 PAGE_WIDTH   = 516
 
@@ -86,15 +91,12 @@ class Plotter:
 
                 # check all tasks
 
-                exec_start = exec_stop = app_start = 0.
-                with open('%s.prof' % f_path, encoding='utf8') as fd:
-                    for line in fd.readlines():
-                        if 'exec_start' in line:
-                            exec_start = float(line.split(',')[0])
-                        elif 'app_start' in line:
-                            app_start = float(line.split(',')[0])
-                        elif 'exec_stop' in line:
-                            exec_stop = float(line.split(',')[0])
+                e_times = get_event_times('%s.prof' % f_path,
+                                          ['exec_start', 'app_start',
+                                           'exec_stop'])
+                exec_start = e_times.get('exec_start', 0.)
+                app_start  = e_times.get('app_start', 0.)
+                exec_stop  = e_times.get('exec_stop', 0.)
 
                 if not exec_start:
                     continue
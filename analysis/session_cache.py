@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__email__     = 'info@radical-cybertools.org'
+__copyright__ = 'Copyright 2022, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Persistent on-disk cache for loaded RA sessions: `ra.Session` object together
+with the derived `s_pilots`, `s_tasks` and `pid` is pickled per session id,
+and it is re-used as long as the files of the session directory (names,
+sizes and modification times) stay the same.
+"""
+
+import glob
+import hashlib
+import os
+import pickle
+
+import radical.analytics as ra
+
+from profiling import PROFILER
+
+CACHE_DIR_NAME  = '.cache'
+CACHE_FILE_NAME = '%s.session.pkl'
+CACHE_VERSION   = 1
+
+
+def get_cache_dir(input_dir):
+    return os.path.join(input_dir, CACHE_DIR_NAME)
+
+
+def get_cache_path(cache_dir, sid):
+    return os.path.join(cache_dir, CACHE_FILE_NAME % sid)
+
+
+def get_fingerprint(session_dir):
+    f_stats = []
+    for root, _, f_names in os.walk(session_dir):
+        for f_name in f_names:
+            f_stat = os.stat(os.path.join(root, f_name))
+            f_stats.append((os.path.relpath(os.path.join(root, f_name),
+                                            session_dir),
+                            f_stat.st_size, f_stat.st_mtime_ns))
+    f_stats.sort()
+    return hashlib.sha1(
+        repr((CACHE_VERSION, f_stats)).encode('utf8')).hexdigest()
+
+
+def read_session(session_dir):
+    with PROFILER.stage('ra.Session'):
+        session = ra.Session(session_dir, 'radical.pilot')
+    s_data  = {'session' : session,
+               's_pilots': session.filter(etype='pilot', inplace=False),
+               's_tasks' : session.filter(etype='task', inplace=False)}
+    s_data['pid'] = s_data['s_pilots'].list('uid')[0]
+    return s_data
+
+
+def load_session(input_dir, sid, cache_dir=None, refresh=False):
+    """
+    Return dict with `session`, `s_pilots`, `s_tasks` and `pid` of the session
+    from the cache, or (re-)create and cache it if the cache entry is missing,
+    outdated, or `refresh` is set.
+    """
+    session_dir = os.path.join(input_dir, sid)
+    cache_dir   = cache_dir or get_cache_dir(input_dir)
+    cache_path  = get_cache_path(cache_dir, sid)
+    fingerprint = get_fingerprint(session_dir)
+
+    if not refresh and os.path.isfile(cache_path):
+        try:
+            PROFILER.count_read(os.path.getsize(cache_path))
+            with open(cache_path, 'rb') as fd, PROFILER.stage('unpickle'):
+                cached = pickle.load(fd)
+            if cached['fingerprint'] == fingerprint:
+                return cached['data']
+        except Exception as e:
+            print('session cache for %s is corrupted (%s)' % (sid, e))
+
+    s_data = read_session(session_dir)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = '%s.tmp.%s' % (cache_path, os.getpid())
+    try:
+        with open(tmp_path, 'wb') as fd:
+            pickle.dump({'fingerprint': fingerprint, 'data': s_data}, fd,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        print('session %s is not cached (%s)' % (sid, e))
+        if os.path.isfile(tmp_path):
+            os.unlink(tmp_path)
+
+    return s_data
+
+
+def invalidate(input_dir, sids=None, cache_dir=None):
+    """
+    Remove cache entries of the provided sessions (all sessions by default).
+    """
+    cache_dir = cache_dir or get_cache_dir(input_dir)
+    if sids is None:
+        cache_paths = glob.glob(get_cache_path(cache_dir, '*'))
+    else:
+        cache_paths = [get_cache_path(cache_dir, sid) for sid in sids]
+
+    for cache_path in cache_paths:
+        if os.path.isfile(cache_path):
+            os.unlink(cache_path)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__email__     = 'info@radical-cybertools.org'
+__copyright__ = 'Copyright 2022, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Mergeable streaming summary of a distribution (e.g., task placement times):
+running moments (count, mean, variance, min, max) and a t-digest for
+quantiles. Summaries are updated with batches of values and merged across
+DVMs, runs or sub-agents without keeping the values themselves.
+
+    s = Sketch()
+    s.update(placements_dvm_0)
+    s.merge(Sketch().update(placements_dvm_1))
+    s.get_stats()  # {'count', 'mean', 'std', 'min', 'max', 'p50', ...}
+"""
+
+import math
+
+import numpy as np
+
+COMPRESSION = 200  # max number of centroids is about half of that
+QUANTILES   = [50, 75, 95, 99]
+
+
+class Moments:
+
+    def __init__(self):
+
+        self.count = 0
+        self.mean  = 0.
+        self.m2    = 0.  # sum of squared deviations from the mean
+        self.min   = math.inf
+        self.max   = -math.inf
+
+    @property
+    def std(self):
+        # population standard deviation (as `statistics.pstdev`)
+        return math.sqrt(self.m2 / self.count) if self.count else 0.
+
+    def _combine(self, count, mean, m2, v_min, v_max):
+        # parallel algorithm by Chan et al.
+        total = self.count + count
+        delta = mean - self.mean
+        self.m2    += m2 + delta * delta * self.count * count / total
+        self.mean  += delta * count / total
+        self.count  = total
+        self.min    = min(self.min, v_min)
+        self.max    = max(self.max, v_max)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if values.size:
+            mean = float(values.mean())
+            self._combine(int(values.size), mean,
+                          float(((values - mean) ** 2).sum()),
+                          float(values.min()), float(values.max()))
+        return self
+
+    def merge(self, other):
+        if other.count:
+            self._combine(other.count, other.mean, other.m2,
+                          other.min, other.max)
+        return self
+
+
+class TDigest:
+
+    def __init__(self, compression=COMPRESSION):
+
+        self.compression = compression
+        self.means   = np.array([], dtype=np.float64)  # centroids
+        self.weights = np.array([], dtype=np.float64)
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    def _k(self, q):
+        # scale function k1, centroids are smaller at the tails
+        return self.compression / (2 * math.pi) * np.arcsin(2 * q - 1)
+
+    def _compress(self, means, weights):
+        order   = np.argsort(means, kind='stable')
+        means   = means[order]
+        weights = weights[order]
+
+        # neighbouring values with the same integer part of `k(q)` (of their
+        # left edge) form a centroid, thus every centroid spans at most
+        # one unit of k-space
+        q_left = (np.cumsum(weights) - weights) / weights.sum()
+        groups = np.floor(self._k(q_left) - self._k(0.)).astype(np.int64)
+        groups = np.unique(groups, return_inverse=True)[1]
+
+        self.weights = np.bincount(groups, weights=weights)
+        self.means   = np.bincount(groups, weights=means * weights) / \
+            self.weights
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if values.size:
+            self._compress(np.concatenate([self.means, values]),
+                           np.concatenate([self.weights,
+                                           np.ones(values.size)]))
+        return self
+
+    def merge(self, other):
+        if other.means.size:
+            self._compress(np.concatenate([self.means, other.means]),
+                           np.concatenate([self.weights, other.weights]))
+        return self
+
+    def quantile(self, q, v_min=None, v_max=None):
+        """
+        Return the estimated value at quantile `q` (0..1), values are
+        interpolated between centroids and the provided min/max values.
+        """
+        if not self.means.size:
+            return math.nan
+        total   = self.count
+        centers = np.cumsum(self.weights) - self.weights / 2.
+        x = np.concatenate([[0.], centers, [total]])
+        y = np.concatenate([[self.means[0] if v_min is None else v_min],
+                            self.means,
+                            [self.means[-1] if v_max is None else v_max]])
+        return float(np.interp(np.asarray(q) * total, x, y))
+
+
+class Sketch:
+
+    def __init__(self, compression=COMPRESSION):
+
+        self.moments = Moments()
+        self.digest  = TDigest(compression)
+
+    @property
+    def count(self):
+        return self.moments.count
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        self.moments.update(values)
+        self.digest.update(values)
+        return self
+
+    def merge(self, other):
+        self.moments.merge(other.moments)
+        self.digest.merge(other.digest)
+        return self
+
+    def quantile(self, q):
+        if q <= 0.:
+            return self.moments.min
+        elif q >= 1.:
+            return self.moments.max
+        return self.digest.quantile(q, self.moments.min, self.moments.max)
+
+    def get_stats(self, quantiles=None):
+        """
+        Return `{'count', 'mean', 'std', 'min', 'max', 'p<N>', ...}` with
+        quantiles as percentiles (`QUANTILES` by default).
+        """
+        m = self.moments
+        stats = {'count': m.count,
+                 'mean' : m.mean,
+                 'std'  : m.std,
+                 'min'  : m.min if m.count else math.nan,
+                 'max'  : m.max if m.count else math.nan}
+        for p in (quantiles or QUANTILES):
+            stats['p%s' % p] = self.quantile(p / 100.)
+        return stats
+
+    def get_boxplot_stats(self, label=None, whis=1.5):
+        """
+        Return stats for `matplotlib.axes.Axes.bxp` (without fliers), the
+        ends of whiskers are estimated as the farthest values within
+        `whis * IQR` from the box, limited by min/max values.
+        """
+        q1, med, q3 = (self.quantile(q) for q in (0.25, 0.5, 0.75))
+        iqr = q3 - q1
+        return {'label'  : label,
+                'mean'   : self.moments.mean,
+                'med'    : med,
+                'q1'     : q1,
+                'q3'     : q3,
+                'whislo' : max(self.moments.min, q1 - whis * iqr),
+                'whishi' : min(self.moments.max, q3 + whis * iqr),
+                'fliers' : []}
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__email__     = 'info@radical-cybertools.org'
+__copyright__ = 'Copyright 2022, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Decoder for task slot files (`task.*.sl`), which keep the Python literal of
+the slots dict assigned by the scheduler. Only `partition_id` (DVM id), node
+names, and numbers of cores and GPUs are extracted with regular expressions;
+if the content doesn't look as expected, it is decoded with
+`ast.literal_eval` instead.
+"""
+
+import ast
+import re
+
+# number of cores is taken from the first process of the rank (as `core_map`
+# is a list of per-process core lists), GPUs - per rank
+CORE_MAP_RE     = re.compile(r"'core_map':\s*\[\[([^\]]*)\]")
+GPU_MAP_RE      = re.compile(r"'gpu_map':\s*\[((?:\s*\[[^\]]*\]\s*,?)*)\s*\]")
+NODE_NAME_RE    = re.compile(r"'name':\s*'([^'\\]*)'")
+PARTITION_ID_RE = re.compile(r"'partition_id':\s*(?:'(\d+)'|(\d+)|None)")
+
+
+def _count_items(values):
+    return values.count(',') + 1 if values.strip() else 0
+
+
+def _parse_literal(data):
+    slots  = ast.literal_eval(data)
+    output = {'partition_id': -1, 'nodes': [], 'cpus': 0, 'gpus': 0}
+    for rank in slots['nodes']:
+        output['nodes'].append(rank['name'])
+        output['cpus'] += len(rank['core_map'][0])
+        if rank['gpu_map']:
+            output['gpus'] += len(rank['gpu_map'])
+    if slots.get('partition_id') is not None:
+        output['partition_id'] = int(slots['partition_id'])
+    return output
+
+
+def parse_slots(data):
+    """
+    Return `{'partition_id': int, 'nodes': [node_name, ...], 'cpus': int,
+    'gpus': int}` from the content of the slot file (`partition_id` is -1
+    if not set).
+    """
+    core_maps  = CORE_MAP_RE.findall(data)
+    gpu_maps   = GPU_MAP_RE.findall(data)
+    nodes      = NODE_NAME_RE.findall(data)
+    partitions = PARTITION_ID_RE.findall(data)
+
+    # every rank has a node name, a core map and a GPU map; `partition_id`
+    # nested into other values (e.g., `lm_info`) can't be told apart from
+    # the top-level one, thus such slots are decoded as a literal
+    if not core_maps or len(partitions) != 1 or \
+            not len(core_maps) == len(gpu_maps) == len(nodes):
+        return _parse_literal(data)
+
+    partition_id = partitions[0][0] or partitions[0][1]
+    return {'partition_id': int(partition_id) if partition_id else -1,
+            'nodes'       : nodes,
+            'cpus'        : sum(_count_items(c) for c in core_maps),
+            'gpus'        : sum(g.count('[') for g in gpu_maps)}
+
+
+def read_slots(sl_path):
+    with open(sl_path, encoding='utf8') as fd:
+        return parse_slots(fd.read())
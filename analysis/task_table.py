@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__email__     = 'info@radical-cybertools.org'
+__copyright__ = 'Copyright 2022, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Per-session columnar task table: task sandboxes (`<sid>.pilot/task.*`) are
+scanned once, and the collected per-task data is stored as a single NumPy
+`.npz` file next to the session directory (`<sid>.tasks.npz`). The table is
+rebuilt only if task sandboxes or agent profiles have changed since the last
+scan.
+"""
+
+import glob
+import os
+import re
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from prof_parser import get_event_times
+from profiling   import PROFILER
+from slot_parser import parse_slots
+
+TABLE_FILE_NAME = '%s.tasks.npz'
+TABLE_VERSION   = 4
+
+CHUNK_SIZE      = 512  # number of task sandboxes processed by a worker at once
+
+# missing values: timestamps -> 0., integer attributes -> -1
+TASK_COLUMNS = [
+    ('uid'         , str       ),
+    ('exec_start'  , np.float64),
+    ('app_start'   , np.float64),
+    ('app_stop'    , np.float64),
+    ('exec_stop'   , np.float64),
+    ('sleep'       , np.int64  ),  # sleep argument (runtime) of `hello_rp.sh`
+    ('cpus'        , np.int32  ),
+    ('gpus'        , np.int32  ),
+    ('partition_id', np.int32  ),  # DVM id
+    ('nodes'       , str       ),  # comma-separated names of task nodes
+    ('status'      , np.int32  ),  # exit status reported by `prun`
+    ('out_size'    , np.int64  ),  # -1 if file doesn't exist
+    ('err_size'    , np.int64  )
+]
+
+PROF_EVENTS = {'task_exec_start': 'exec_start',
+               'app_start'      : 'app_start',
+               'app_stop'       : 'app_stop',
+               'task_exec_stop' : 'exec_stop'}
+
+EXIT_STATUS_RE = re.compile(r'COMPLETED WITH STATUS (\d+)')
+
+
+def get_table_path(input_dir, sid):
+    return os.path.join(input_dir, TABLE_FILE_NAME % sid)
+
+
+def get_task_sandboxes(pilot_sandbox):
+    # entry types are taken from the directory listing (no `stat` per task)
+    if not os.path.isdir(pilot_sandbox):
+        return []
+    with os.scandir(pilot_sandbox) as entries:
+        return sorted(e.path for e in entries
+                      if e.name.startswith('task.') and e.is_dir())
+
+
+def get_fingerprint(t_sandboxes, session_dir):
+    # new task files change the modification time of the task sandbox, while
+    # appends to task files (e.g., by a running task) are not stat'ed per
+    # task: the progress of tasks is recorded by agent profiles as well, thus
+    # the latest modification time and the total size of agent profiles and
+    # logs are used together with the number and modification time of task
+    # sandboxes
+    mtime, size = 0, 0
+    for t_sandbox in t_sandboxes:
+        mtime = max(mtime, os.stat(t_sandbox).st_mtime_ns)
+    for f_path in glob.glob('%s/**/*.prof' % session_dir, recursive=True) + \
+            glob.glob('%s/**/*.log' % session_dir, recursive=True):
+        f_stat = os.stat(f_path)
+        mtime  = max(mtime, f_stat.st_mtime_ns)
+        size  += f_stat.st_size
+    return np.array([TABLE_VERSION, len(t_sandboxes), mtime, size],
+                    dtype=np.int64)
+
+
+def _file_size(f_path):
+    try:
+        return os.path.getsize(f_path)
+    except OSError:
+        return -1
+
+
+def read_task(t_sandbox):
+    uid    = os.path.basename(t_sandbox)
+    f_path = '%s/%s' % (t_sandbox, uid)
+
+    record = {'uid'         : uid,
+              'exec_start'  : 0.,
+              'app_start'   : 0.,
+              'app_stop'    : 0.,
+              'exec_stop'   : 0.,
+              'sleep'       : -1,
+              'cpus'        : -1,
+              'gpus'        : -1,
+              'partition_id': -1,
+              'nodes'       : '',
+              'status'      : -1,
+              'out_size'    : _file_size('%s.out' % f_path),
+              'err_size'    : _file_size('%s.err' % f_path)}
+
+    if os.path.isfile('%s.prof' % f_path):
+        for e_name, e_time in get_event_times('%s.prof' % f_path,
+                                              PROF_EVENTS).items():
+            record[PROF_EVENTS[e_name]] = e_time
+
+    if os.path.isfile('%s.sh' % f_path):
+        with open('%s.sh' % f_path, encoding='utf8') as fd:
+            sh_data = fd.read()
+            PROFILER.count_read(os.fstat(fd.fileno()).st_size)
+        for line in sh_data.splitlines():
+            if line.startswith('prun'):
+                record['sleep'] = int(line.split('"')[3])
+                break
+
+    if os.path.isfile('%s.sl' % f_path):
+        with open('%s.sl' % f_path, encoding='utf8') as fd:
+            sl_data = fd.read()
+            PROFILER.count_read(os.fstat(fd.fileno()).st_size)
+        slots = parse_slots(sl_data)
+        record['cpus']         = slots['cpus']
+        record['gpus']         = slots['gpus']
+        record['partition_id'] = slots['partition_id']
+        record['nodes']        = ','.join(slots['nodes'])
+
+    if record['err_size'] > 0:
+        with open('%s.err' % f_path, encoding='utf8') as fd:
+            err_data = fd.read()
+            PROFILER.count_read(os.fstat(fd.fileno()).st_size)
+        exit_status = EXIT_STATUS_RE.search(err_data)
+        if exit_status:
+            record['status'] = int(exit_status.group(1))
+
+    return record
+
+
+def read_tasks(t_sandboxes):
+    # compact per-task records (tuples ordered as `TASK_COLUMNS`)
+    names = [name for name, _ in TASK_COLUMNS]
+    return [tuple(record[n] for n in names)
+            for record in map(read_task, t_sandboxes)]
+
+
+def _read_tasks_chunk(t_sandboxes):
+    # files and bytes read by the worker process are reported back
+    files, n_bytes = PROFILER.files, PROFILER.bytes
+    records = read_tasks(t_sandboxes)
+    return records, PROFILER.files - files, PROFILER.bytes - n_bytes
+
+
+def build_task_table(t_sandboxes, n_workers=1, chunk_size=CHUNK_SIZE):
+    """
+    Scan task sandboxes serially (`n_workers=1`) or in chunks with a pool of
+    worker processes (`n_workers=None` uses all available CPUs), the order of
+    tasks in the table is the same in both cases.
+    """
+    if n_workers == 1 or len(t_sandboxes) <= chunk_size:
+        records = read_tasks(t_sandboxes)
+    else:
+        chunks  = [t_sandboxes[i:i + chunk_size]
+                   for i in range(0, len(t_sandboxes), chunk_size)]
+        records = []
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            for chunk_records, files, n_bytes in executor.map(
+                    _read_tasks_chunk, chunks):
+                records.extend(chunk_records)
+                PROFILER.count_read(n_bytes, files)
+
+    columns = list(zip(*records)) or [[] for _ in TASK_COLUMNS]
+    return {name: np.array(column, dtype=dtype)
+            for (name, dtype), column in zip(TASK_COLUMNS, columns)}
+
+
+@PROFILER.profiled('task_table')
+def get_task_table(input_dir, sid, rebuild=False, n_workers=1):
+    """
+    Return task table of the session as a dict of NumPy arrays (columns).
+    """
+    table_path   = get_table_path(input_dir, sid)
+    with PROFILER.stage('glob'):
+        t_sandboxes  = get_task_sandboxes('%s/%s.pilot' % (input_dir, sid))
+        fingerprint  = get_fingerprint(t_sandboxes,
+                                       os.path.join(input_dir, sid))
+
+    if not rebuild and os.path.isfile(table_path):
+        PROFILER.count_read(os.path.getsize(table_path))
+        with np.load(table_path) as data:
+            if np.array_equal(data['_fingerprint'], fingerprint):
+                return {name: data[name] for name, _ in TASK_COLUMNS}
+
+    with PROFILER.stage('task_scan'):
+        table = build_task_table(t_sandboxes, n_workers=n_workers)
+    np.savez(table_path, _fingerprint=fingerprint, **table)
+    return table
+
+
+def get_app_start(table):
+    # if `app_start` is not set, then it is adjusted as `exec_stop - sleep`
+    no_app_start = (table['app_start'] == 0.) & (table['exec_stop'] != 0.) & \
+                   (table['sleep'] >= 0)
+    return np.where(no_app_start,
+                    table['exec_stop'] - table['sleep'],
+                    table['app_start'])
+
+
+def is_executed(table):
+    # tasks that were executed have non-empty `.err` and `.out` files
+    return (table['err_size'] > 0) & (table['out_size'] > 0)
+
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-i', '--input_dir', default='../data/workspace')
+    parser.add_argument('-r', '--rebuild', action='store_true', default=False)
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='Number of worker processes (default: all CPUs)')
+    parser.add_argument('sids', nargs='+')
+    opts = parser.parse_args()
+
+    for _sid in opts.sids:
+        _table = get_task_table(opts.input_dir, _sid, rebuild=opts.rebuild,
+                                n_workers=opts.workers)
+        print('%s - tasks: %s, executed: %s' % (
+            _sid, len(_table['uid']), int(is_executed(_table).sum())))
+
+# ------------------------------------------------------------------------------
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__email__     = 'info@radical-cybertools.org'
+__copyright__ = 'Copyright 2022, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Throughput engine: timestamps of the tracked events (e.g., tasks passed by
+the scheduler to the executor, or tasks launched by the executor) are
+collected within one streaming pass over profiles, and turned into a
+tasks/second time series over a sliding window, together with percentiles,
+peak sustained rate and idle intervals.
+
+    python throughput.py <prof_path> [<prof_path> ...] --event exec_ok
+"""
+
+import argparse
+import json
+
+import numpy as np
+
+from prof_parser import merge_profs
+
+# tasks scheduled (passed to the executor) and tasks launched
+SCHEDULED_EVENT = {'event': 'put', 'state': 'AGENT_EXECUTING_PENDING'}
+LAUNCHED_EVENT  = {'event': 'exec_ok'}
+
+WINDOW      = 10.  # sliding window (s)
+STEP        = 1.   # time between points of the series (s)
+IDLE_GAP    = 20.  # min time without events to be treated as idle (s)
+SUSTAINED   = 60.  # min duration of the sustained rate (s)
+PERCENTILES = [5, 25, 50, 75, 95, 99]
+
+
+def get_times(prof_paths, event, state=None):
+    """
+    Return sorted timestamps of events with the provided name (and state)
+    from one or several (merged) profiles.
+    """
+    if isinstance(prof_paths, str):
+        prof_paths = [prof_paths]
+
+    times = [e.time for _, e in merge_profs(prof_paths, events=[event])
+             if state is None or e.state == state]
+    return np.array(times, dtype=np.float64)
+
+
+def get_throughput(times, window=WINDOW, step=STEP, t_range=None):
+    """
+    Return `(points, rates)` - number of events per second within the window
+    `(t - window, t]` at every point `t` of the grid with the step `step`
+    over `t_range` (time span of events by default).
+    """
+    times = np.sort(np.asarray(times, dtype=np.float64))
+    if not times.size:
+        return np.array([], dtype=np.float64), np.array([], dtype=np.float64)
+
+    t_min, t_max = t_range or (times[0], times[-1])
+    points = np.arange(t_min, t_max + step, step)
+    counts = np.searchsorted(times, points, side='right') - \
+        np.searchsorted(times, points - window, side='right')
+    return points, counts / window
+
+
+def get_idle_intervals(times, idle_gap=IDLE_GAP):
+    """
+    Return `[(start, stop), ...]` - intervals between consecutive events,
+    which are longer than `idle_gap`.
+    """
+    times = np.sort(np.asarray(times, dtype=np.float64))
+    gaps  = np.flatnonzero(np.diff(times) > idle_gap)
+    return [(float(times[i]), float(times[i + 1])) for i in gaps]
+
+
+def get_sustained_rate(rates, step=STEP, sustained=SUSTAINED):
+    """
+    Return the highest rate, which was held (as a minimum) for at least
+    `sustained` seconds.
+    """
+    n_points = max(int(round(sustained / step)), 1)
+    if len(rates) < n_points:
+        return 0.
+    windows = np.lib.stride_tricks.sliding_window_view(rates, n_points)
+    return float(windows.min(axis=1).max())
+
+
+def get_throughput_stats(times, window=WINDOW, step=STEP, idle_gap=IDLE_GAP,
+                         sustained=SUSTAINED, percentiles=None):
+    """
+    Return throughput statistics of events; percentiles are calculated over
+    points of the series outside of idle intervals.
+    """
+    times = np.sort(np.asarray(times, dtype=np.float64))
+    percentiles = percentiles or PERCENTILES
+
+    stats = {'count'         : int(times.size),
+             'duration'      : 0.,
+             'idle_time'     : 0.,
+             'idle_intervals': [],
+             'rate'          : 0.,  # over the duration without idle time
+             'peak'          : 0.,
+             'peak_sustained': 0.,
+             'percentiles'   : {}}
+    if times.size < 2:
+        return stats
+
+    points, rates = get_throughput(times, window=window, step=step)
+    idle_intervals = get_idle_intervals(times, idle_gap=idle_gap)
+
+    is_active = np.ones(points.size, dtype=bool)
+    for start, stop in idle_intervals:
+        # the window that ends after the idle start still counts events
+        is_active[(points >= start + window) & (points < stop)] = False
+
+    stats['duration']       = float(times[-1] - times[0])
+    stats['idle_time']      = float(sum(stop - start for start, stop
+                                        in idle_intervals))
+    stats['idle_intervals'] = idle_intervals
+    busy_time = stats['duration'] - stats['idle_time']
+    if busy_time > 0:
+        stats['rate'] = round(times.size / busy_time, 2)
+    stats['peak'] = float(rates.max())
+    stats['peak_sustained'] = get_sustained_rate(rates, step=step,
+                                                 sustained=sustained)
+    stats['percentiles'] = {
+        p: round(float(v), 2) for p, v in zip(
+            percentiles, np.percentile(rates[is_active], percentiles))}
+    return stats
+
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('prof_paths', nargs='+')
+    parser.add_argument('-e', '--event', default=LAUNCHED_EVENT['event'])
+    parser.add_argument('-s', '--state', default=None)
+    parser.add_argument('-w', '--window', type=float, default=WINDOW)
+    parser.add_argument('-t', '--step', type=float, default=STEP)
+    parser.add_argument('-g', '--idle_gap', type=float, default=IDLE_GAP)
+    parser.add_argument('-d', '--sustained', type=float, default=SUSTAINED)
+    opts = parser.parse_args()
+
+    _times = get_times(opts.prof_paths, opts.event, opts.state)
+    print(json.dumps(get_throughput_stats(_times,
+                                          window=opts.window,
+                                          step=opts.step,
+                                          idle_gap=opts.idle_gap,
+                                          sustained=opts.sustained),
+                     indent=4))
+
+# ------------------------------------------------------------------------------
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__email__     = 'info@radical-cybertools.org'
+__copyright__ = 'Copyright 2022, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Time-resolved utilization per DVM (PRRTE partition): task execution windows
+from the task table are turned into +/- slot changes, which are ordered by
+(DVM, time) with a single `np.lexsort`, and the number of busy CPU/GPU slots
+over time is their cumulative sum. Idle slot-seconds are integrated over the
+lifetime of each DVM (from its first task start till its last task stop).
+"""
+
+import os
+
+import numpy as np
+
+GPUS_PER_NODE   = 6  # Summit
+HOSTS_FILE_NAME = 'prrte.%03d.hosts'
+
+
+def read_dvm_hosts(pilot_sandbox, dvm_id):
+    """
+    Return `[(host_name, cpu_slots), ...]` from the DVM hosts file.
+    """
+    hosts = []
+    hosts_file = os.path.join(pilot_sandbox, HOSTS_FILE_NAME % dvm_id)
+    with open(hosts_file, encoding='utf8') as fd:
+        for line in fd:
+            if not line.strip():
+                continue
+            host_name, slots = line.split()
+            hosts.append((host_name, int(slots.split('=')[1])))
+    return hosts
+
+
+def get_dvm_slots(pilot_sandbox, dvm_ids, gpus_per_node=GPUS_PER_NODE):
+    """
+    Return `{dvm_id: (cpu_slots, gpu_slots)}`.
+    """
+    dvm_slots = {}
+    for dvm_id in dvm_ids:
+        hosts = read_dvm_hosts(pilot_sandbox, dvm_id)
+        dvm_slots[int(dvm_id)] = (sum(slots for _, slots in hosts),
+                                  len(hosts) * gpus_per_node)
+    return dvm_slots
+
+
+def _ratio(value, total):
+    return value / total if total else 0.
+
+
+def get_dvm_utilization(table, dvm_slots, selected=None, sampling=None):
+    """
+    Return per DVM `{dvm_id: {...}}` with busy CPU/GPU slots over time
+    (`time`, `cpu`, `gpu` arrays, step function with values after each
+    time point), number of slots, lifetime (`start`, `end`), busy and idle
+    slot-seconds, and average utilization.
+
+    Tasks are taken from the task table (all tasks with both execution
+    timestamps by default); with `sampling` curves are resampled onto the
+    same time grid (with that step) for all DVMs.
+    """
+    if selected is None:
+        selected = np.ones(table['uid'].size, dtype=bool)
+    selected = selected & (table['exec_start'] != 0.) & \
+        (table['exec_stop'] != 0.) & (table['partition_id'] >= 0)
+
+    exec_start = table['exec_start'][selected]
+    exec_stop  = table['exec_stop'][selected]
+    cpus       = table['cpus'][selected].astype(np.int64)
+    gpus       = table['gpus'][selected].astype(np.int64)
+    dvm_ids    = table['partition_id'][selected]
+
+    if not dvm_ids.size:
+        return {}
+
+    times   = np.concatenate([exec_start, exec_stop])
+    d_cpus  = np.concatenate([cpus, -cpus])
+    d_gpus  = np.concatenate([gpus, -gpus])
+    e_dvms  = np.concatenate([dvm_ids, dvm_ids])
+
+    # released slots go before the acquired ones at the same time point
+    order  = np.lexsort((d_cpus, times, e_dvms))
+    times  = times[order]
+    e_dvms = e_dvms[order]
+    # every task releases its slots, thus cumulative sums are back to zero
+    # at the end of each DVM
+    busy_cpus = np.cumsum(d_cpus[order])
+    busy_gpus = np.cumsum(d_gpus[order])
+
+    if sampling:
+        grid = np.arange(times.min(), times.max() + sampling, sampling)
+
+    output = {}
+    bounds = np.flatnonzero(np.diff(e_dvms)) + 1
+    for idx_start, idx_end in zip(np.r_[0, bounds], np.r_[bounds, times.size]):
+
+        dvm_id = int(e_dvms[idx_start])
+        d_time = times[idx_start:idx_end]
+        d_cpu  = busy_cpus[idx_start:idx_end]
+        d_gpu  = busy_gpus[idx_start:idx_end]
+
+        cpu_slots, gpu_slots = dvm_slots[dvm_id]
+        start, end = float(d_time[0]), float(d_time[-1])
+        durations  = np.diff(d_time)
+        cpu_busy   = float((d_cpu[:-1] * durations).sum())
+        gpu_busy   = float((d_gpu[:-1] * durations).sum())
+        lifetime   = end - start
+
+        if sampling:
+            idx   = np.searchsorted(d_time, grid, side='right') - 1
+            valid = (idx >= 0) & (grid <= end)
+            idx   = np.clip(idx, 0, None)
+            d_cpu = np.where(valid, d_cpu[idx], 0)
+            d_gpu = np.where(valid, d_gpu[idx], 0)
+            d_time = grid
+
+        output[dvm_id] = {
+            'time'     : d_time,
+            'cpu'      : d_cpu,
+            'gpu'      : d_gpu,
+            'cpu_slots': cpu_slots,
+            'gpu_slots': gpu_slots,
+            'start'    : start,
+            'end'      : end,
+            'cpu_busy' : cpu_busy,
+            'gpu_busy' : gpu_busy,
+            'cpu_idle' : cpu_slots * lifetime - cpu_busy,
+            'gpu_idle' : gpu_slots * lifetime - gpu_busy,
+            'cpu_util' : _ratio(cpu_busy, cpu_slots * lifetime),
+            'gpu_util' : _ratio(gpu_busy, gpu_slots * lifetime)
+        }
+
+    return output
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__email__     = 'info@radical-cybertools.org'
+__copyright__ = 'Copyright 2022, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Client-side cost of task descriptions: generation time, serialization time
+(as submitted to the agent) and peak memory of the workload descriptions,
+with descriptions built from a fresh nested dict per task (`dict`) and
+stamped out of the verified prototype of the template (`template`).
+
+    python bench_task_descriptions.py -b 8
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+import radical.pilot as rp
+
+from task_template import TaskTemplate
+from workload      import get_workload, N_TASKS_BASE, N_TASKS_L_RATIO
+
+SHARED = {'cpu_processes': 1,
+          'executable'   : './hello_rp.sh',
+          'input_staging': [{'source': 'pilot:///hello_rp.sh',
+                             'target': 'task:///hello_rp.sh',
+                             'action': rp.LINK}]}
+
+
+def get_description_dict(cpus, gpus, runtime):
+    return rp.TaskDescription({'cpu_processes': 1,
+                               'cpu_threads'  : cpus,
+                               'gpu_processes': gpus,
+                               'executable'   : './hello_rp.sh',
+                               'arguments'    : [runtime],
+                               'input_staging': [
+                                   {'source': 'pilot:///hello_rp.sh',
+                                    'target': 'task:///hello_rp.sh',
+                                    'action': rp.LINK}]})
+
+
+def get_description_template(template, cpus, gpus, runtime):
+    return template.get_description(cpu_threads=cpus,
+                                    gpu_processes=gpus,
+                                    arguments=[runtime])
+
+
+def run_bench(tasks, get_description):
+    tracemalloc.start()
+    t_start = time.perf_counter()
+    tds = [get_description(cpus, gpus, runtime)
+           for cpus, gpus, runtime, _ in tasks.tolist()]
+    t_generate = time.perf_counter() - t_start
+    mem_peak   = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    t_start = time.perf_counter()
+    for td in tds:
+        json.dumps(td.as_dict())
+    t_serialize = time.perf_counter() - t_start
+
+    return {'tasks'        : len(tds),
+            'generate (s)' : round(t_generate, 3),
+            'serialize (s)': round(t_serialize, 3),
+            'mem_peak (MB)': round(mem_peak / 1024 ** 2, 2)}
+
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-b', '--nbases', type=int, default=1,
+                        help='Number to multiply base number of nodes')
+    opts = parser.parse_args()
+
+    _tasks    = get_workload(N_TASKS_BASE, N_TASKS_L_RATIO, opts.nbases,
+                             seed=0)
+    _template = TaskTemplate(SHARED)
+    _args     = tuple(_tasks[['cpus', 'gpus', 'runtime']][0].tolist())
+    print('equal descriptions: %s' % (
+        get_description_dict(*_args).as_dict() ==
+        get_description_template(_template, *_args).as_dict()))
+    for _name, _get_description in [
+            ('dict'    , get_description_dict),
+            ('template', lambda *args: get_description_template(_template,
+                                                                *args))]:
+        print('%-8s - %s' % (_name, run_bench(_tasks, _get_description)))
+
+# ------------------------------------------------------------------------------
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__email__     = 'info@radical-cybertools.org'
+__copyright__ = 'Copyright 2022, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Offline scheduling simulator: tasks of the workload are packed onto nodes
+(`N_CORES_PER_NODE * SMT` CPU slots and `N_GPUS_PER_NODE` GPU slots per
+node, split into DVM partitions of contiguous nodes) with the first-fit
+policy as of RP CONTINUOUS scheduler: whenever slots are freed, waiting tasks
+are tried in the submission order and placed onto the first node with enough
+free slots (tasks that don't fit are skipped, later tasks may fill the gap).
+Every task is a single rank, thus tasks larger than a node are not placed.
+DVM partitions are used for reporting only: placement is the same for any
+number of DVMs (neither per-DVM launch costs nor partition boundaries are
+modeled), and tasks are attributed to the DVM of their node.
+Node occupancy is kept in arrays, and tasks of the same size are grouped,
+thus the simulation of a full-scale workload takes seconds.
+
+Predicted makespan, CPU/GPU utilization (overall and per DVM) and idle slots
+are reported, including slots idle while tasks are waiting (fragmentation).
+
+    python simulator.py -b 8 -d 8 --seed 42
+    python simulator.py --replay ../data/workspace/<sid> -n 256 -d 1
+"""
+
+import argparse
+import heapq
+import json
+import time
+
+import numpy as np
+
+from workload import get_workload, get_recorded_workload, get_seed, \
+    N_CORES_PER_NODE, N_GPUS_PER_NODE, N_EXEC_NODES_BASE, N_TASKS_BASE, \
+    N_TASKS_L_RATIO, REPLAY_ORDERS, SMT_LEVEL
+
+
+def _get_max_free(free_cpu, free_gpu, gpu_values):
+    # max number of free CPU slots on a node with at least `g` free GPUs
+    output = {}
+    for g in gpu_values:
+        with_gpus = free_cpu[free_gpu >= g]
+        output[g] = int(with_gpus.max()) if with_gpus.size else -1
+    return output
+
+
+def simulate(tasks, n_nodes, smt=SMT_LEVEL, n_dvms=1, overhead=0.):
+    """
+    Return per-task placements as a dict of arrays (`start`, `stop`, `node`,
+    `partition_id`; `NaN`/`-1` for tasks that don't fit into a node) for
+    `tasks` (`workload.WORKLOAD_DTYPE`, ordered by submission). `overhead`
+    is added to the runtime of every task (e.g., placement time). `n_dvms`
+    only sets `partition_id` of placed tasks.
+    """
+    cpus_per_node = N_CORES_PER_NODE * smt
+    free_cpu  = np.full(n_nodes, cpus_per_node, dtype=np.int64)
+    free_gpu  = np.full(n_nodes, N_GPUS_PER_NODE, dtype=np.int64)
+    partition = np.arange(n_nodes) * n_dvms // n_nodes
+
+    n_tasks   = tasks.size
+    durations = tasks['runtime'].astype(np.float64) + overhead
+    output    = {'start'       : np.full(n_tasks, np.nan),
+                 'stop'        : np.full(n_tasks, np.nan),
+                 'node'        : np.full(n_tasks, -1, dtype=np.int64),
+                 'partition_id': np.full(n_tasks, -1, dtype=np.int64)}
+
+    # tasks of the same size are kept in the submission order, thus only the
+    # first waiting task of every size is tried
+    shapes, shape_idx = np.unique(np.stack([tasks['cpus'], tasks['gpus']],
+                                           axis=1), axis=0,
+                                  return_inverse=True)
+    shape_idx = shape_idx.ravel()
+    order     = np.argsort(shape_idx, kind='stable')
+    bounds    = np.searchsorted(shape_idx[order],
+                                np.arange(shapes.shape[0] + 1))
+    queues    = [order[bounds[s]:bounds[s + 1]]
+                 for s in range(shapes.shape[0])]
+    heads     = [0] * len(queues)
+    fits_node = (shapes[:, 0] <= cpus_per_node) & \
+                (shapes[:, 1] <= N_GPUS_PER_NODE)
+    gpu_values = np.unique(shapes[:, 1]).tolist()
+
+    running  = []  # heap of (stop time, task index)
+    stranded = [0., 0.]  # idle slot-seconds (cpu, gpu) while tasks wait
+    t_now    = 0.
+    while True:
+
+        # scheduling round: waiting tasks are tried in the submission order
+        max_free   = _get_max_free(free_cpu, free_gpu, gpu_values)
+        candidates = [(int(queues[s][heads[s]]), s)
+                      for s in range(len(queues))
+                      if fits_node[s] and heads[s] < queues[s].size]
+        heapq.heapify(candidates)
+        while candidates:
+            t_idx, s = heapq.heappop(candidates)
+            cpus, gpus = int(shapes[s, 0]), int(shapes[s, 1])
+            if cpus > max_free[gpus]:
+                continue  # no node fits the task till the next round
+
+            node = int(np.argmax((free_cpu >= cpus) & (free_gpu >= gpus)))
+            free_cpu[node] -= cpus
+            free_gpu[node] -= gpus
+            max_free = _get_max_free(free_cpu, free_gpu, gpu_values)
+
+            output['start'][t_idx] = t_now
+            output['stop'][t_idx]  = t_now + durations[t_idx]
+            output['node'][t_idx]  = node
+            heapq.heappush(running, (t_now + durations[t_idx], t_idx))
+
+            heads[s] += 1
+            if heads[s] < queues[s].size:
+                heapq.heappush(candidates, (int(queues[s][heads[s]]), s))
+
+        if not running:
+            break
+
+        # release slots of all tasks that finish next
+        t_next = running[0][0]
+        if any(fits_node[s] and heads[s] < queues[s].size
+               for s in range(len(queues))):
+            stranded[0] += float(free_cpu.sum()) * (t_next - t_now)
+            stranded[1] += float(free_gpu.sum()) * (t_next - t_now)
+        while running and running[0][0] == t_next:
+            _, t_idx = heapq.heappop(running)
+            free_cpu[output['node'][t_idx]] += tasks['cpus'][t_idx]
+            free_gpu[output['node'][t_idx]] += tasks['gpus'][t_idx]
+        t_now = t_next
+
+    placed = output['node'] >= 0
+    output['partition_id'][placed] = partition[output['node'][placed]]
+    output['stranded'] = tuple(stranded)
+    return output
+
+
+def get_summary(tasks, placements, n_nodes, smt=SMT_LEVEL, n_dvms=1):
+    """
+    Return predicted makespan, utilization of CPU/GPU slots (overall and per
+    DVM), average number of idle slots (overall and while tasks wait).
+    """
+    placed   = placements['node'] >= 0
+    makespan = float(np.nanmax(placements['stop'])) if placed.any() else 0.
+    runtimes = placements['stop'][placed] - placements['start'][placed]
+    cpu_busy = tasks['cpus'][placed] * runtimes
+    gpu_busy = tasks['gpus'][placed] * runtimes
+
+    nodes_per_dvm = np.bincount(np.arange(n_nodes) * n_dvms // n_nodes,
+                                minlength=n_dvms)
+    cpu_slots = nodes_per_dvm * N_CORES_PER_NODE * smt
+    gpu_slots = nodes_per_dvm * N_GPUS_PER_NODE
+    dvm_cpu_busy = np.bincount(placements['partition_id'][placed],
+                               weights=cpu_busy, minlength=n_dvms)
+    dvm_gpu_busy = np.bincount(placements['partition_id'][placed],
+                               weights=gpu_busy, minlength=n_dvms)
+
+    def _ratio(_busy, _slots):
+        return round(float(_busy) / (_slots * makespan), 4) \
+            if _slots and makespan else 0.
+
+    def _idle(_busy, _slots):
+        return round(float(_slots - _busy / makespan), 2) if makespan else 0.
+
+    return {
+        'tasks'          : int(tasks.size),
+        'unschedulable'  : int((~placed).sum()),
+        'nodes'          : n_nodes,
+        'dvms'           : n_dvms,
+        'makespan'       : round(makespan, 2),
+        'cpu_util'       : _ratio(cpu_busy.sum(), cpu_slots.sum()),
+        'gpu_util'       : _ratio(gpu_busy.sum(), gpu_slots.sum()),
+        'idle_cpu_slots' : _idle(cpu_busy.sum(), cpu_slots.sum()),
+        'idle_gpu_slots' : _idle(gpu_busy.sum(), gpu_slots.sum()),
+        # idle slots while tasks are waiting (averaged over the makespan)
+        'stranded_slots' : [round(s / makespan, 2) if makespan else 0.
+                            for s in placements['stranded']],
+        'dvm_util'       : {dvm_id: (_ratio(dvm_cpu_busy[dvm_id],
+                                            cpu_slots[dvm_id]),
+                                     _ratio(dvm_gpu_busy[dvm_id],
+                                            gpu_slots[dvm_id]))
+                            for dvm_id in range(n_dvms)}}
+
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-b', '--nbases', type=int, default=1,
+                        help='Number to multiply base number of nodes')
+    parser.add_argument('-n', '--nnodes', type=int, default=None,
+                        help='Number of nodes (default: all nodes of bases)')
+    parser.add_argument('-d', '--ndvms', type=int, default=1,
+                        help='Number of DVM partitions (reporting only, '
+                             'does not affect placement)')
+    parser.add_argument('--smt', type=int, default=SMT_LEVEL)
+    parser.add_argument('--overhead', type=float, default=0.,
+                        help='Time added to the runtime of every task')
+    parser.add_argument('-s', '--seed', type=int, default=None,
+                        help='Seed of the workload generator')
+    parser.add_argument('-r', '--replay', default=None,
+                        help='Session directory to replay the workload from')
+    parser.add_argument('-o', '--order', choices=REPLAY_ORDERS,
+                        default='original', help='Order of replayed tasks')
+    parser.add_argument('--allow-partial', action='store_true',
+                        default=False,
+                        help='Replay tasks with known requirements only')
+    opts = parser.parse_args()
+
+    if opts.replay:
+        _tasks = get_recorded_workload(opts.replay, opts.order,
+                                       seed=get_seed(opts.seed),
+                                       allow_partial=opts.allow_partial)
+    else:
+        _tasks = get_workload(N_TASKS_BASE, N_TASKS_L_RATIO, opts.nbases,
+                              seed=get_seed(opts.seed))
+    _n_nodes = opts.nnodes or N_EXEC_NODES_BASE * opts.nbases
+
+    _start = time.perf_counter()
+    _placements = simulate(_tasks, _n_nodes, opts.smt, opts.ndvms,
+                           opts.overhead)
+    print('simulated in %.3f sec' % (time.perf_counter() - _start))
+    print(json.dumps(get_summary(_tasks, _placements, _n_nodes, opts.smt,
+                                 opts.ndvms), indent=4))
+
+# ------------------------------------------------------------------------------
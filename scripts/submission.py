@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__email__     = 'info@radical-cybertools.org'
+__copyright__ = 'Copyright 2022, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Streaming task submission: task descriptions are generated lazily and
+submitted in bulks, and the next bulk is submitted only when the backlog
+(tasks submitted, but not yet passed by the agent scheduler) is below the
+limit. The backlog is tracked with task state callbacks, thus the submission
+follows the observed scheduling rate, and only the backlog is kept by the
+submitter.
+"""
+
+import itertools
+import threading
+import time
+
+import radical.pilot as rp
+
+BULK_SIZE   = 1024
+MAX_BACKLOG = 4096
+
+# states of tasks that are not yet passed by the agent scheduler
+PRE_SCHEDULED_STATES = {rp.NEW,
+                        rp.TMGR_SCHEDULING_PENDING,
+                        rp.TMGR_SCHEDULING,
+                        rp.TMGR_STAGING_INPUT_PENDING,
+                        rp.TMGR_STAGING_INPUT,
+                        rp.AGENT_STAGING_INPUT_PENDING,
+                        rp.AGENT_STAGING_INPUT,
+                        rp.AGENT_SCHEDULING_PENDING,
+                        rp.AGENT_SCHEDULING}
+
+
+class Submitter:
+
+    def __init__(self, tmgr, bulk_size=BULK_SIZE, max_backlog=MAX_BACKLOG):
+
+        self._tmgr        = tmgr
+        self._bulk_size   = bulk_size
+        self._max_backlog = max(max_backlog, bulk_size)
+
+        self._pending   = set()  # uids of submitted not scheduled tasks
+        self._scheduled = 0
+        self._cond      = threading.Condition()
+
+        self._tmgr.register_callback(self._state_cb)
+
+    def _state_cb(self, task, state):
+
+        if state not in PRE_SCHEDULED_STATES:
+            with self._cond:
+                if task.uid in self._pending:
+                    self._pending.remove(task.uid)
+                    self._scheduled += 1
+                    self._cond.notify()
+        return True
+
+    @property
+    def backlog(self):
+        with self._cond:
+            return len(self._pending)
+
+    def _wait_backlog(self, n_tasks):
+        # blocks until the bulk of `n_tasks` fits into the backlog
+        with self._cond:
+            self._cond.wait_for(
+                lambda: len(self._pending) + n_tasks <= self._max_backlog)
+
+    def submit(self, descriptions):
+        """
+        Submit task descriptions (any iterable, e.g., a generator) in bulks,
+        return the number of submitted tasks.
+        """
+        descriptions = iter(descriptions)
+        n_submitted  = 0
+        t_start      = time.time()
+        while True:
+            bulk = list(itertools.islice(descriptions, self._bulk_size))
+            if not bulk:
+                break
+            self._wait_backlog(len(bulk))
+
+            tasks = self._tmgr.submit_tasks(bulk)
+            with self._cond:
+                # tasks might be already scheduled (callbacks are ahead)
+                self._pending.update(t.uid for t in tasks
+                                     if t.state in PRE_SCHEDULED_STATES)
+                n_scheduled = self._scheduled
+            n_submitted += len(tasks)
+
+            t_elapsed = time.time() - t_start
+            print('submitted: %s, scheduled: %s, rate: %.2f tasks/s' % (
+                n_submitted, n_scheduled,
+                n_scheduled / t_elapsed if t_elapsed else 0.))
+        return n_submitted
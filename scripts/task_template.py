@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__email__     = 'info@radical-cybertools.org'
+__copyright__ = 'Copyright 2022, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Task description template: a prototype description with attributes shared by
+all tasks (executable, staging directives, etc.) is built and verified once,
+and per-task descriptions are stamped out of it by setting only attributes
+that differ (e.g., `cpu_threads`, `gpu_processes`, `arguments`). Shared
+values (e.g., `input_staging`) are referenced by all descriptions and are
+neither copied nor verified per task.
+"""
+
+import radical.pilot as rp
+
+
+class TaskTemplate:
+
+    def __init__(self, shared):
+
+        self._prototype = rp.TaskDescription(shared)
+        self._prototype.verify()
+
+        # values of `ru.TypedDict` are kept in `_data`, otherwise (e.g.,
+        # older RP versions) descriptions are constructed from a dict
+        self._data = self._prototype.__dict__.get('_data')
+        self._shared = dict(shared)
+
+    def get_description(self, **attrs):
+
+        if self._data is None:
+            from_dict = dict(self._shared)
+            from_dict.update(attrs)
+            return rp.TaskDescription(from_dict)
+
+        # constructor (defaults, casting and verification) is skipped
+        td = rp.TaskDescription.__new__(rp.TaskDescription)
+        td.__dict__['_data'] = dict(self._data)
+        for key, value in attrs.items():
+            td[key] = value
+        return td
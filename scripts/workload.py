@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+
+__author__    = 'RADICAL-Cybertools Team'
+__email__     = 'info@radical-cybertools.org'
+__copyright__ = 'Copyright 2022, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Workload generator: task requirements (cpus, gpus, runtime, size class) of
+the whole workload are produced with one seeded NumPy generator as a
+structured array. Per-generation constraints are kept: the average number
+of CPUs per task is set such that tasks of one size class fill the slots of
+the main nodes `N_GENERATIONS_*` times, and GPUs are assigned to the largest
+"large" tasks. The set of tasks of one base is replicated for every base.
+
+A workload can also be reconstructed from a recorded session (task table of
+the session: cpus and gpus from `task.*.sl`, runtime from the `prun` line of
+`task.*.sh`; client-side task descriptions for tasks not scheduled by the
+agent) to replay the same load in the original or a chosen order.
+
+    python workload.py -b 8 --seed 42
+    python workload.py --replay ../data/workspace/<sid> --order large_first
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'analysis'))
+from prof_parser import read_prof  # noqa: E402
+from task_table import get_task_table  # noqa: E402
+
+SMT_LEVEL            = 4
+N_CORES_PER_NODE     = 42
+N_CPUS_PER_NODE      = N_CORES_PER_NODE * SMT_LEVEL
+N_GPUS_PER_NODE      = 6
+
+N_EXEC_NODES_MAIN    = 248  # "main" (i.e., active) nodes
+N_EXEC_NODES_SUPP    = 8    # "supplementary" nodes (~3%)
+N_EXEC_NODES_BASE    = N_EXEC_NODES_MAIN + N_EXEC_NODES_SUPP
+
+CPUS_RANGE_S         = [ 1, 21]     # up to one socket size
+CPUS_RANGE_L         = [42, 84]     # 2-4 times of socket size
+TASK_RUNTIME_RANGE_S = [480,  600]  # 08-10min (4x)
+TASK_RUNTIME_RANGE_L = [960, 1200]  # 16-20min (2x)
+N_GENERATIONS_S      = 4
+N_GENERATIONS_L      = 2
+
+N_TASKS_BASE         = 8200         # total number of tasks per 256 nodes
+N_TASKS_L_RATIO      = .1           # ratio of "large" tasks
+
+# orders of replayed tasks (`original` - by task ids, i.e., submission order)
+REPLAY_ORDERS = ['original', 'reverse', 'shuffle', 'large_first',
+                 'small_first']
+
+WORKLOAD_DTYPE = np.dtype([('cpus'      , np.int32),
+                           ('gpus'      , np.int32),
+                           ('runtime'   , np.int32),
+                           ('size_class', 'U5')])
+
+
+def get_cpus_range(n_tasks, n_generations, n_slots, cpus_range=None):
+    """
+    Return the range of CPUs per task (symmetric around the average, which
+    is set by the number of slots to be filled per generation).
+    """
+    avg_n_cpus = int((n_slots * n_generations) / n_tasks)
+    cpus_range = list(cpus_range or [avg_n_cpus - 1, avg_n_cpus + 1])
+    if avg_n_cpus < 1:
+        raise RuntimeError('AVG value (%s) not set' % avg_n_cpus)
+    elif not (cpus_range[0] < avg_n_cpus < cpus_range[1]):
+        raise RuntimeError('AVG value (%s) not within the range' % avg_n_cpus)
+    elif not cpus_range[0]:
+        cpus_range[0] = 1
+    var = min(cpus_range[1] - avg_n_cpus, avg_n_cpus - cpus_range[0])
+    print('# tasks: %s ' % n_tasks,
+          'avg cpus: %s ' % avg_n_cpus,
+          'cpus range: %s' % [avg_n_cpus - var, avg_n_cpus + var])
+    return avg_n_cpus - var, avg_n_cpus + var
+
+
+def get_tasks_per_generation(rng, n_tasks, n_generations, n_slots,
+                             runtime_range, size_class, cpus_range=None):
+    tasks = np.zeros(n_tasks, dtype=WORKLOAD_DTYPE)
+    cpus_min, cpus_max = get_cpus_range(n_tasks, n_generations, n_slots,
+                                        cpus_range)
+    # ranges are inclusive (as `random.randint`)
+    tasks['cpus']       = rng.integers(cpus_min, cpus_max + 1, n_tasks)
+    tasks['runtime']    = rng.integers(runtime_range[0], runtime_range[1] + 1,
+                                       n_tasks)
+    tasks['size_class'] = size_class
+    return tasks
+
+
+def get_workload(n_tasks=N_TASKS_BASE, ratio_l=N_TASKS_L_RATIO, n_bases=1,
+                 seed=None):
+    """
+    Return the workload as a structured array (`WORKLOAD_DTYPE`): "large"
+    tasks of all bases (ordered by the number of CPUs, the largest have
+    GPUs), followed by "small" tasks of all bases.
+    """
+    rng = np.random.default_rng(seed)
+
+    n_tasks_l = int(n_tasks * ratio_l)
+    tasks_l = get_tasks_per_generation(
+        rng,
+        n_tasks=n_tasks_l,
+        n_generations=N_GENERATIONS_L,
+        n_slots=(SMT_LEVEL - 1) * N_CORES_PER_NODE * N_EXEC_NODES_MAIN,
+        runtime_range=TASK_RUNTIME_RANGE_L,
+        size_class='large',
+        cpus_range=CPUS_RANGE_L)
+    tasks_l = tasks_l[np.argsort(-tasks_l['cpus'], kind='stable')]
+    # set GPUs to the largest tasks
+    tasks_l['gpus'][:N_EXEC_NODES_MAIN * N_GENERATIONS_L] = N_GPUS_PER_NODE
+
+    tasks_s = get_tasks_per_generation(
+        rng,
+        n_tasks=n_tasks - n_tasks_l,
+        n_generations=N_GENERATIONS_S,
+        n_slots=N_CORES_PER_NODE * N_EXEC_NODES_MAIN,
+        runtime_range=TASK_RUNTIME_RANGE_S,
+        size_class='small',
+        cpus_range=CPUS_RANGE_S)
+
+    return np.concatenate([np.tile(tasks_l, n_bases),
+                           np.tile(tasks_s, n_bases)])
+
+
+def read_task_descriptions(session_dir):
+    """
+    Return `{uid: (cpus, gpus, runtime)}` from client-side task descriptions
+    of the session (`<sid>.json`, empty if not available).
+    """
+    json_path = os.path.join(session_dir, '%s.json' %
+                             os.path.basename(session_dir))
+    if not os.path.isfile(json_path):
+        return {}
+
+    with open(json_path, encoding='utf8') as fd:
+        tasks = json.load(fd).get('task', [])
+
+    output = {}
+    for task in tasks:
+        td = task.get('description') or {}
+        if task.get('uid') and td.get('arguments'):
+            output[task['uid']] = (int(td.get('cpu_threads') or 1),
+                                   int(td.get('gpu_processes') or 0),
+                                   int(td['arguments'][0]))
+    return output
+
+
+def get_submitted_uids(session_dir):
+    # tasks submitted by the client (task manager profiles)
+    uids = set()
+    for prof_path in glob.glob('%s/tmgr.*.prof' % session_dir):
+        for e in read_prof(prof_path, events=['advance']):
+            if e.uid.startswith('task.'):
+                uids.add(e.uid)
+    return uids
+
+
+def get_recorded_workload(session_dir, order='original', seed=None,
+                          n_workers=None, allow_partial=False):
+    """
+    Return the workload (`WORKLOAD_DTYPE`) of the recorded session in the
+    requested order (`REPLAY_ORDERS`). Requirements of tasks, which were not
+    scheduled by the agent (e.g., the session was truncated by walltime),
+    are taken from client-side task descriptions. If requirements of some
+    submitted tasks are unknown, then `RuntimeError` is raised, unless
+    `allow_partial` is set (such tasks are skipped).
+    """
+    session_dir = os.path.abspath(session_dir.rstrip('/'))
+    table = get_task_table(os.path.dirname(session_dir),
+                           os.path.basename(session_dir),
+                           n_workers=n_workers)
+
+    known = (table['cpus'] > 0) & (table['gpus'] >= 0) & \
+        (table['sleep'] >= 0)
+    requirements = dict(zip(table['uid'][known].tolist(),
+                            zip(table['cpus'][known].tolist(),
+                                table['gpus'][known].tolist(),
+                                table['sleep'][known].tolist())))
+    descriptions = read_task_descriptions(session_dir)
+    for uid, reqs in descriptions.items():
+        requirements.setdefault(uid, reqs)
+
+    uids = set(table['uid'].tolist()) | set(descriptions) | \
+        get_submitted_uids(session_dir)
+    unknown = len(uids) - len(requirements)
+    if unknown:
+        if not allow_partial:
+            raise RuntimeError('Requirements of %s tasks are unknown (set '
+                               '`allow_partial` to skip them)' % unknown)
+        print('tasks with unknown requirements (skipped): %s' % unknown)
+
+    # task ids are zero-padded, thus ordered as submitted
+    uids  = sorted(requirements)
+    tasks = np.zeros(len(uids), dtype=WORKLOAD_DTYPE)
+    if uids:
+        tasks['cpus'], tasks['gpus'], tasks['runtime'] = \
+            np.array([requirements[uid] for uid in uids]).T
+    tasks['size_class'] = np.where(tasks['cpus'] > CPUS_RANGE_S[1],
+                                   'large', 'small')
+
+    if order == 'reverse':
+        tasks = tasks[::-1]
+    elif order == 'shuffle':
+        tasks = tasks[np.random.default_rng(seed).permutation(tasks.size)]
+    elif order in ['large_first', 'small_first']:
+        is_large = tasks['size_class'] == 'large'
+        tasks = np.concatenate([tasks[is_large], tasks[~is_large]]) \
+            if order == 'large_first' else \
+            np.concatenate([tasks[~is_large], tasks[is_large]])
+    elif order != 'original':
+        raise ValueError('Unknown order of tasks: %s' % order)
+
+    return tasks
+
+
+def get_seed(seed=None):
+    # a new seed is reported to be able to regenerate the same workload
+    if seed is None:
+        seed = int(np.random.SeedSequence().entropy % 2 ** 32)
+    print('workload seed: %s' % seed)
+    return seed
+
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-b', '--nbases', type=int, default=1,
+                        help='Number to multiply base number of nodes')
+    parser.add_argument('-s', '--seed', type=int, default=None,
+                        help='Seed of the workload generator')
+    parser.add_argument('-r', '--replay', default=None,
+                        help='Session directory to replay the workload from')
+    parser.add_argument('-o', '--order', choices=REPLAY_ORDERS,
+                        default='original', help='Order of replayed tasks')
+    parser.add_argument('--allow-partial', action='store_true',
+                        default=False,
+                        help='Replay tasks with known requirements only')
+    opts = parser.parse_args()
+
+    _start = time.perf_counter()
+    if opts.replay:
+        _tasks = get_recorded_workload(opts.replay, opts.order,
+                                       seed=get_seed(opts.seed),
+                                       allow_partial=opts.allow_partial)
+    else:
+        _tasks = get_workload(n_bases=opts.nbases, seed=get_seed(opts.seed))
+    print('generated in %.3f sec' % (time.perf_counter() - _start))
+
+    for _s_class in ['large', 'small']:
+        _selected = _tasks[_tasks['size_class'] == _s_class]
+        if not _selected.size:
+            continue
+        print('%s - tasks: %s, cpus: %s, gpus: %s, runtime (avg): %.2f' % (
+            _s_class, _selected.size, int(_selected['cpus'].sum()),
+            int(_selected['gpus'].sum()), _selected['runtime'].mean()))
+
+# ------------------------------------------------------------------------------